@@ -0,0 +1,91 @@
+"""Compare per-model position updates with a kinematics system.
+
+Usage: python benchmarks/kinematics.py [count] [ticks]
+
+Both versions move bouncing entities in a box, the first one with a
+model per entity updating an xytuple, like BackgroundModel.
+"""
+
+import os
+import sys
+import time
+import random
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mvctools import BaseModel, xytuple
+from mvctools import kinematics
+from mvctools.kinematics import KinematicsSystem, BOUNCE
+
+
+class FakeControl(object):
+    gamedata = resource = settings = None
+
+
+class FakeState(object):
+    control = FakeControl()
+    current_fps = 60.
+
+
+class BouncingModel(BaseModel):
+
+    low = xytuple(0., 0.)
+    high = xytuple(100., 100.)
+
+    def init(self, pos, step):
+        self.pos = xytuple(*pos)
+        self.step = xytuple(*step)
+
+    def update(self):
+        delta = 1.0/self.state.current_fps
+        pos = self.pos + self.step * delta
+        if not self.low.x <= pos.x <= self.high.x:
+            self.step = xytuple(-self.step.x, self.step.y)
+            pos = self.pos + self.step * delta
+        if not self.low.y <= pos.y <= self.high.y:
+            self.step = xytuple(self.step.x, -self.step.y)
+            pos = self.pos + self.step * delta
+        self.pos = pos
+
+
+def entities(count):
+    random.seed(0)
+    return [((random.uniform(0, 100), random.uniform(0, 100)),
+             (random.uniform(-50, 50), random.uniform(-50, 50)))
+            for _ in range(count)]
+
+
+def run_models(count, ticks):
+    root = BaseModel(FakeState())
+    for pos, step in entities(count):
+        BouncingModel(root, pos, step)
+    start = time.time()
+    for _ in range(ticks):
+        root._update()
+    return time.time() - start
+
+
+def run_system(count, ticks):
+    root = BaseModel(FakeState())
+    system = KinematicsSystem(root)
+    for pos, step in entities(count):
+        system.add(pos, step, ((0, 0), (100, 100)), BOUNCE)
+    start = time.time()
+    for _ in range(ticks):
+        root._update()
+    return time.time() - start
+
+
+def main(count=2000, ticks=100):
+    backend = "numpy" if kinematics.numpy else "lists"
+    print("{} entities, {} ticks, system on {}".format(count, ticks, backend))
+    models = run_models(count, ticks)
+    system = run_system(count, ticks)
+    print("models {:8.3f} ms/tick".format(models * 1000 / ticks))
+    print("system {:8.3f} ms/tick ({:.1f}x)".format(
+        system * 1000 / ticks, models / system))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
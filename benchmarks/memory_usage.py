@@ -0,0 +1,77 @@
+"""Measure the memory used by the models and sprites of the board example.
+
+Usage: python benchmarks/memory_usage.py [level]
+
+The size of an instance includes its attribute dictionary, if any, and
+the containers it owns (children, rect and the rect state, world rect).
+"""
+
+import os
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault("SDL_AUDIODRIVER", "disk")
+
+from run_examples import Example
+from examples.board import BoardState
+from mvctools import Timer, AutoSprite
+from mvctools.display import OffscreenBackend
+
+
+def instance_size(obj):
+    """Return the size of an object and of its attribute dictionary."""
+    size = sys.getsizeof(obj)
+    dct = getattr(obj, "__dict__", None)
+    if dct is not None:
+        size += sys.getsizeof(dct)
+    return size
+
+
+def footprint(obj):
+    """Return the size of an object and of the containers it owns."""
+    size = instance_size(obj)
+    children = getattr(obj, "children", None)
+    if children is not None:
+        size += sys.getsizeof(children)
+    if isinstance(obj, AutoSprite):
+        rect = obj.rect
+        size += instance_size(rect) + sys.getsizeof(rect.sprites)
+        size += sys.getsizeof(rect._state)
+        if obj.world:
+            size += sys.getsizeof(obj.world_rect)
+    return size
+
+
+def report(name, objects):
+    if not objects:
+        return
+    total = sum(footprint(obj) for obj in objects)
+    print("{:<10} {:>6} objects {:>8.1f} bytes each".format(
+        name, len(objects), float(total) / len(objects)))
+
+
+def main(level=0):
+    Example.display_class = OffscreenBackend
+    control = Example()
+    control.gamedata.board_level = level
+    control.settings.set_mode()
+    state = BoardState(control)
+    control.current_state = state
+    for _ in range(3):
+        state.tick()
+    groups = defaultdict(list)
+    for key, model in state.model.get_model_dct():
+        name = "Timer" if isinstance(model, Timer) else "Model"
+        groups[name].append(model)
+    for group in (state.view.group, state.view.static_group):
+        groups["Sprite"].extend(group.sprites())
+    print("Board level {}".format(level))
+    for name in ("Model", "Timer", "Sprite"):
+        report(name, groups[name])
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,139 @@
+"""Compare the vector operations of the hot call sites, old and new.
+
+Usage: python benchmarks/vector.py [number]
+
+The legacy implementation of xytuple is reproduced below, so both
+versions run the same expressions.
+"""
+
+import os
+import sys
+import operator
+import timeit
+from collections import namedtuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mvctools.common import xytuple, xyvector
+
+
+class legacytuple(namedtuple("legacytuple", ("x", "y"))):
+    """xytuple as it was implemented with map."""
+
+    __add__ = lambda self, it: legacytuple(*map(operator.add, self, it))
+    __sub__ = lambda self, it: legacytuple(*map(operator.sub, self, it))
+    __mul__ = lambda self, it: legacytuple(*map(operator.mul, self, it))
+    __div__ = __truediv__ = lambda self, it: \
+        legacytuple(*map(operator.truediv, self, it))
+    __neg__ = lambda self: self * (-1, -1)
+
+    def map(self, func):
+        return legacytuple(*map(func, self))
+
+
+def player_pos(cls):
+    """PlayerModel.pos, while moving."""
+    round_pos, direction, ratio = cls(3, 4), cls(0, 1), 0.25
+    def run():
+        return round_pos + direction * (ratio, ratio)
+    return run
+
+
+def isoconvert(cls):
+    """TileSprite.isoconvert."""
+    basesize, pos = cls(64, 48), cls(3.25, 4)
+    if cls is legacytuple:
+        def run():
+            iso = cls(pos.y - pos.x, pos.x + pos.y)
+            iso *= basesize * (0.5, 0.5)
+            return iso.map(round).map(int)
+    else:
+        def run():
+            iso = cls(pos.y - pos.x, pos.x + pos.y)
+            iso *= basesize * 0.5
+            return iso.rounded()
+    return run
+
+
+def midleft(cls):
+    """BaseEntrySprite.midleft."""
+    size, first_ratio, shift_ratio, index = cls(1280, 720), \
+        (0.2, 0.6), (0.1, 0.07), 3
+    if cls is legacytuple:
+        def run():
+            first = size * first_ratio
+            shift = size * shift_ratio
+            return (first + shift * ((index,) * 2)).map(int)
+    else:
+        def run():
+            first = size * first_ratio
+            shift = size * shift_ratio
+            return (first + shift * index).truncated()
+    return run
+
+
+def background_update(cls):
+    """BackgroundModel.update."""
+    low, high, fps = cls(0., 0.), cls(3., 3.), 40.
+    state = {"pos": cls(1.5, 1.5), "step": cls(-0.05, -0.1)}
+    if cls is legacytuple:
+        def run():
+            for i in (1, -1):
+                for j in (1, -1):
+                    shift = state["step"] * (i, j)
+                    shift *= (1.0 / fps,) * 2
+                    new_pos = state["pos"] + shift
+                    if all(map(operator.le, low, new_pos) +
+                           map(operator.le, new_pos, high)):
+                        state["pos"] = new_pos
+                        state["step"] *= (i, j)
+                        return
+    else:
+        def run():
+            pos, step = state["pos"], state["step"]
+            delta = 1.0 / fps
+            for i in (1, -1):
+                for j in (1, -1):
+                    new_pos = pos + step * (i * delta, j * delta)
+                    if low.x <= new_pos.x <= high.x and \
+                       low.y <= new_pos.y <= high.y:
+                        state["pos"] = new_pos
+                        state["step"] = step * (i, j)
+                        return
+    return run
+
+
+def inplace_move(cls):
+    """Position updated in place, with an xyvector for the new version."""
+    speed = cls(0.5, -0.25)
+    if cls is legacytuple:
+        state = {"pos": cls(0., 0.)}
+        def run():
+            pos = state["pos"]
+            for _ in range(10):
+                pos += speed
+            state["pos"] = pos
+    else:
+        vector = xyvector(0., 0.)
+        def run():
+            pos = vector
+            for _ in range(10):
+                pos += speed
+    return run
+
+
+def main(number=100000):
+    print("{:<20} {:>10} {:>10} {:>8}".format(
+        "call site", "old (us)", "new (us)", "speedup"))
+    for bench in (player_pos, isoconvert, midleft, background_update,
+                  inplace_move):
+        old = min(timeit.repeat(bench(legacytuple), number=number, repeat=3))
+        new = min(timeit.repeat(bench(xytuple), number=number, repeat=3))
+        print("{:<20} {:>10.3f} {:>10.3f} {:>7.1f}x".format(
+            bench.__name__, old * 1e6 / number, new * 1e6 / number,
+            old / new))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -101,7 +101,7 @@ class PlayerModel(TileModel):
 
     @pos.setter
     def pos(self, value):
-        self.real_pos = xytuple(*value).map(int)
+        self.real_pos = xytuple(*value).truncated()
 
     @property
     def goal(self):
@@ -231,8 +231,9 @@ class BoardModel(BaseModel):
         # Build the board and tiles
         self.player_dct = {}
         self.goal_dct = {}
-        self.resource_lst = list(self.control.resource.map)
-        try: self.board = self.resource_lst[self.level]
+        maps = self.control.resource.map
+        self.map_lst = maps.getfilenames()
+        try: self.board = maps.getmap(self.map_lst[self.level])
         except IndexError: self.load_next_board()
         self.tile_dct = self.build_tiles(self.board)
         # Useful attributes
@@ -246,7 +247,7 @@ class BoardModel(BaseModel):
         if win:
             self.level += 1
         try:
-            self.resource_lst[self.level]
+            self.map_lst[self.level]
         except IndexError:
             self.level = 0
             next_state = self.state.next_state
@@ -290,25 +291,9 @@ class BoardModel(BaseModel):
 
     # Build
     
-    def build_tiles(self, resource):
-        mat = self.parse(resource)
-        mat = self.add_border(mat)
+    def build_tiles(self, board):
         return {(i,j): self.type_dct[element](self, (i,j))
-                    for i, line in enumerate(mat)
-                        for j, element in enumerate(line)}
-
-    @staticmethod
-    def parse(resource):
-        resource = iter(resource)
-        next(line for line in resource if line.startswith("data="))
-        parseline = lambda line: [int(x) for x in line.strip().split(",") if x]
-        return [parseline(line) for line in resource if "," in line]
-
-    @staticmethod
-    def add_border(mat):
-        first = last = [[-1] * (2 + len(mat[0]))]
-        middle = [[-1] + x + [-1] for x in mat]
-        return first + middle + last
+                    for i, j, element in board.iter_tiles(border=-1)}
 
     def build_goal(self, pos, pid):
         self.goal_dct[pid] = GoalModel(self, pos, pid)
@@ -5,9 +5,6 @@ from mvctools import BaseView, AutoSprite, Animation, xytuple
 from boardmodel import BlockModel, FloorModel, BlackHoleModel, \
                        BorderModel, PlayerModel, GoalModel
 
-# Imports
-from math import ceil
-
 # Sprite classes
 
 class TileSprite(AutoSprite):
@@ -21,9 +18,9 @@ class TileSprite(AutoSprite):
         self.basesize = self.compute_basesize()
         # Shifting
         center = self.model.parent.max_coordinate * (0.5,0.5)
-        shift = self.settings.size/(2,2) - self.isoconvert(center)
+        shift = self.settings.render_size/(2,2) - self.isoconvert(center)
         shift += (0, self.basesize.y * 0.5)
-        self.shift = shift.map(round).map(int)
+        self.shift = shift.rounded()
         # Layer
         self.layer = self.compute_layer()
         # Raw ratio
@@ -41,8 +38,8 @@ class TileSprite(AutoSprite):
 
     def isoconvert(self, pos):
         pos = xytuple(pos.y-pos.x, pos.x+pos.y)
-        pos *= self.basesize * (0.5, 0.5)
-        return pos.map(round).map(int)
+        pos *= self.basesize * 0.5
+        return pos.rounded()
 
     def build_animation(self, resource, timer=None,
                         inf=None, sup=None, looping=True):
@@ -61,16 +58,17 @@ class TileSprite(AutoSprite):
         if self.raw_ratio is None:
             return xytuple(0,0)
         size = self.basesize * (1, self.raw_ratio * 3**0.5)
-        return size.map(ceil).map(int)
+        return size.ceiled()
     
     def compute_raw_ratio(self, resource, name=None):
         raw = resource.getfile(name) if name else resource[0]
         return float(raw.get_height()) / raw.get_width()
 
     def compute_basesize(self):
-        width = float(self.settings.width)/self.max_tile_x
+        width, height = self.settings.render_size
+        width = float(width)/self.max_tile_x
         coresponding_height = width / (3**0.5)
-        height = float(self.settings.height)/self.max_tile_y
+        height = float(height)/self.max_tile_y
         if height > coresponding_height:
             return xytuple(width, coresponding_height)
         coresponding_width = height * (3**0.5)
@@ -2,8 +2,7 @@ from mvctools import BaseModel, AutoSprite, Timer, NextStateException
 from mvctools import property_from_gamedata, xytuple, cursoredlist
 from mvctools.utils.menu import BaseEntrySprite, BaseEntryModel
 from mvctools.utils.renderer import RendererSprite
-
-import operator
+from mvctools.utils.background import ScrollingBackgroundSprite
 
 # Entry
 
@@ -81,7 +80,7 @@ class TimerSprite(RendererSprite):
 
     @property
     def midleft(self):
-        return (self.settings.size * self.position_ratio).map(int)
+        return (self.settings.render_size * self.position_ratio).truncated()
 
     def update(self):
         self.text = self.get_text()
@@ -131,29 +130,24 @@ class BackgroundModel(BaseModel):
         return -xytuple(*self.speed_ratio)
 
     def is_valid_pos(self, pos):
-        return all(map(operator.le, self.low, pos) + \
-                   map(operator.le, pos, self.high))
+        return self.low.x <= pos.x <= self.high.x and \
+               self.low.y <= pos.y <= self.high.y
 
     def update(self):
+        pos, step = self.pos, self.step
+        delta = 1.0/self.state.current_fps
         for i in (1,-1):
             for j in (1,-1):
-                shift = self.step * (i,j)
-                shift *= (1.0/self.state.current_fps,)*2
-                new_pos = self.pos + shift
+                new_pos = pos + step * (i*delta, j*delta)
                 if self.is_valid_pos(new_pos):
                     self.pos = new_pos
-                    self.step *= (i,j)
+                    self.step = step * (i,j)
                     return
 
-class BackgroundSprite(AutoSprite):
+class BackgroundSprite(ScrollingBackgroundSprite):
 
     background = "box_stripes_grey"
+    mirror = True
 
-    def init(self):
-        self.size_ratio = self.model.size_ratio
-        self.image = self.resource.image.getfile(self.background, self.size).copy()
-        self.layer = -1
-
-    def get_rect(self):
-        topleft = -self.model.pos*self.settings.size
-        return self.image.get_rect(topleft=topleft)
+    def get_offset(self):
+        return self.model.pos*self.settings.render_size
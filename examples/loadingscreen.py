@@ -11,7 +11,10 @@ class LoadingModel(BaseModel):
     def init(self):
         super(LoadingModel, self).init()
         self.done = False
-        self.control.resource.load(threaded=True, callback=self.callback)
+        self.control.prepare_next_state(self.state.next_state,
+                                        threaded=True,
+                                        callback=self.callback,
+                                        scheduler=self.state.scheduler)
         
     def update(self):
         if self.done:
@@ -38,7 +41,7 @@ class LoadingSprite(RendererSprite):
 
     @property
     def center(self):
-        return (self.settings.size * self.position_ratio).map(int)
+        return (self.settings.render_size * self.position_ratio).truncated()
 
 
 # Secondary sprite class
@@ -41,7 +41,7 @@ class PauseSprite(RendererSprite):
 
     @property
     def center(self):
-        return (self.settings.size * self.position_ratio).map(int)
+        return (self.settings.render_size * self.position_ratio).truncated()
 
 # View class
 
@@ -29,6 +29,7 @@ class SettingModel(BaseMenuModel):
     setting_dct["SIZE"] = ('800x600', '1024x768', "1280x720", "1600x900")
     setting_dct["MODE"] = ('windowed', 'fullscreen')
     setting_dct["FPS"] = ('40', '60')
+    setting_dct["QUALITY"] = ('smooth', 'fast')
 
     choice_model_class = SettingChoiceModel
     entry_model_class = EntryModel
@@ -0,0 +1,243 @@
+"""Module for the caches of computed values, like rendered images."""
+
+from time import time
+from threading import RLock
+from functools import wraps
+from weakref import WeakSet, ref
+from collections import OrderedDict
+
+
+# Registry of the live caches
+registry = WeakSet()
+
+# Marker for the missing entries
+_missing = object()
+
+
+def get_caches(name=None):
+    """Return the live caches, optionally filtered by name."""
+    return [cache for cache in list(registry)
+            if name is None or cache.name == name]
+
+
+def get_stats():
+    """Return the statistics of the live caches, summed by name."""
+    result = {}
+    for cache in get_caches():
+        stats = result.setdefault(cache.name, {"caches": 0})
+        stats["caches"] += 1
+        for key, value in cache.stats.items():
+            if key != "hit_rate":
+                stats[key] = stats.get(key, 0) + value
+    for stats in result.values():
+        total = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = float(stats["hits"]) / total if total else 0.
+    return result
+
+
+def flush(name=None):
+    """Clear the live caches, optionally filtered by name."""
+    for cache in get_caches(name):
+        cache.clear()
+
+
+def surface_size(surface):
+    """Return the size of the pixels of a surface, in bytes."""
+    return surface.get_pitch() * surface.get_height()
+
+
+def make_key(args, kwargs):
+    """Return a hashable key for the arguments of a call."""
+    if not kwargs:
+        return args
+    return args + (Cache,) + tuple(sorted(kwargs.items()))
+
+
+class Cache(object):
+    """Mapping of computed values, with optional bounds.
+
+    The least recently used entries are evicted when the cache exceeds
+    **maxsize** entries or **maxbytes** bytes, and the entries older than
+    **ttl** seconds are dropped when accessed. If a factory is given, a
+    missing key is computed with factory(\\*key) for tuple keys, or
+    factory(key) otherwise. Hits, misses, evictions and expirations are
+    counted, and all the caches are listed in the module registry.
+
+    With **weak** set, the keys are objects compared by identity, like
+    surfaces, and held by weak references: an entry is dropped when its
+    key is garbage collected. The values must not refer to their key.
+
+    The cache may be shared by several threads, like the preloading thread
+    of the control and the main thread: the lookups, insertions and
+    evictions hold a reentrant lock. The factory is called without the
+    lock, so a value may be computed twice by concurrent misses.
+
+    Args:
+        factory (func or None): function computing the missing values
+            (default is None)
+        maxsize (int or None): maximum number of entries (default is None)
+        ttl (float or None): lifetime of the entries, in seconds
+            (default is None)
+        sizeof (func or None): size of a value in bytes, for instance
+            surface_size (default is None)
+        maxbytes (int or None): maximum size of the values, in bytes.
+            It requires sizeof (default is None)
+        name (str): name of the cache in the registry (default is "cache")
+        clock (func): time function for the ttl (default is time.time)
+        weak (bool): hold the keys by weak references (default is False)
+    """
+
+    counters = ("hits", "misses", "evictions", "expirations")
+
+    def __init__(self, factory=None, maxsize=None, ttl=None, sizeof=None,
+                 maxbytes=None, name="cache", clock=time, weak=False):
+        self.factory = factory
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.maxbytes = maxbytes
+        self.name = name
+        self.clock = clock
+        self.weak = weak
+        self.data = OrderedDict()
+        self.refs = {}
+        self.lock = RLock()
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        registry.add(self)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return self._lookup(self._id(key), False) is not _missing
+
+    def __getitem__(self, key):
+        value = self._lookup(self._id(key))
+        if value is not _missing:
+            return value
+        if self.factory is None:
+            raise KeyError(key)
+        if isinstance(key, tuple):
+            value = self.factory(*key)
+        else:
+            value = self.factory(key)
+        self[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        ident = self._id(key)
+        size = self.sizeof(value) if self.sizeof else 0
+        expiry = self.clock() + self.ttl if self.ttl is not None else None
+        with self.lock:
+            self._discard(ident)
+            self.data[ident] = value, size, expiry
+            if self.weak:
+                self._track(key, ident)
+            self.nbytes += size
+            self._shrink()
+
+    def __delitem__(self, key):
+        if not self._discard(self._id(key)):
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        value = self._lookup(self._id(key))
+        return default if value is _missing else value
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.refs.clear()
+            self.nbytes = 0
+
+    @property
+    def stats(self):
+        with self.lock:
+            stats = dict((name, getattr(self, name))
+                         for name in self.counters)
+            size, nbytes = len(self.data), self.nbytes
+        total = stats["hits"] + stats["misses"]
+        stats.update(size=size, nbytes=nbytes,
+                     hit_rate=float(stats["hits"]) / total if total else 0.)
+        return stats
+
+    def wrap(self, func):
+        """Decorate a function so its results are stored in the cache."""
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            value = self._lookup(key)
+            if value is _missing:
+                value = func(*args, **kwargs)
+                self[key] = value
+            return value
+        wrapper.cache = self
+        return wrapper
+
+    # Internals
+
+    def _id(self, key):
+        return id(key) if self.weak else key
+
+    def _track(self, key, ident):
+        # Drop the entry when the key is collected
+        cache = ref(self)
+        def callback(_):
+            if cache() is not None:
+                cache()._discard(ident)
+        self.refs[ident] = ref(key, callback)
+
+    def _lookup(self, key, count=True):
+        with self.lock:
+            try:
+                value, size, expiry = self.data.pop(key)
+            except KeyError:
+                if count:
+                    self.misses += 1
+                return _missing
+            if expiry is not None and expiry <= self.clock():
+                self.refs.pop(key, None)
+                self.nbytes -= size
+                self.expirations += 1
+                if count:
+                    self.misses += 1
+                return _missing
+            self.data[key] = value, size, expiry
+            if count:
+                self.hits += 1
+            return value
+
+    def _discard(self, key):
+        with self.lock:
+            entry = self.data.pop(key, None)
+            self.refs.pop(key, None)
+            if entry is None:
+                return False
+            self.nbytes -= entry[1]
+            return True
+
+    def _shrink(self):
+        # Called with the lock held
+        while self.data and (
+                (self.maxsize is not None and len(self.data) > self.maxsize)
+                or (self.maxbytes is not None
+                    and self.nbytes > self.maxbytes)):
+            key, (value, size, expiry) = self.data.popitem(last=False)
+            self.refs.pop(key, None)
+            self.nbytes -= size
+            self.evictions += 1
+
+
+def cached(maxsize=None, ttl=None, sizeof=None, maxbytes=None, name=None):
+    """Decorator storing the results of a function in a Cache.
+
+    The cache is available as the **cache** attribute of the decorated
+    function. See Cache for the arguments. The name defaults to the name
+    of the function.
+    """
+    def decorator(func):
+        cache = Cache(maxsize=maxsize, ttl=ttl, sizeof=sizeof,
+                      maxbytes=maxbytes, name=name or func.__name__)
+        return cache.wrap(func)
+    return decorator
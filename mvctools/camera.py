@@ -0,0 +1,201 @@
+"""Module for the camera of the views."""
+
+from math import floor
+from pygame import Rect
+from mvctools.common import xytuple
+from mvctools.resource import rescale
+from mvctools.cache import Cache
+
+
+class SpatialGrid(object):
+    """Uniform grid indexing items by their rect.
+
+    Args:
+        cell_size (int): size of the square cells, in pixels
+    """
+
+    def __init__(self, cell_size=256):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.rects = {}
+
+    def __contains__(self, item):
+        return item in self.rects
+
+    def __len__(self):
+        return len(self.rects)
+
+    def _cells(self, rect):
+        size = self.cell_size
+        right = max(rect.left, rect.right - 1) // size
+        bottom = max(rect.top, rect.bottom - 1) // size
+        return [(i, j) for i in range(rect.left // size, right + 1)
+                       for j in range(rect.top // size, bottom + 1)]
+
+    def insert(self, item, rect):
+        """Insert or move an item."""
+        rect = Rect(rect)
+        if self.rects.get(item) == rect:
+            return
+        self.remove(item)
+        self.rects[item] = rect
+        for cell in self._cells(rect):
+            self.cells.setdefault(cell, set()).add(item)
+
+    def remove(self, item):
+        """Remove an item if it is indexed."""
+        rect = self.rects.pop(item, None)
+        if rect is None:
+            return
+        for cell in self._cells(rect):
+            items = self.cells[cell]
+            items.discard(item)
+            if not items:
+                del self.cells[cell]
+
+    def query(self, rect):
+        """Return the set of items colliding with a rect."""
+        rect = Rect(rect)
+        result = set()
+        for cell in self._cells(rect):
+            result.update(self.cells.get(cell, ()))
+        return set(item for item in result
+                   if self.rects[item].colliderect(rect))
+
+
+class Camera(object):
+    """World to screen transform of a view, with scrolling and zoom.
+
+    The position is the world point displayed at the center of the
+    viewport. By default, the world and screen coordinates are the same.
+
+    Sprites with the **world** attribute set are in world space: their
+    methods get_image and get_rect return the image and the rect in world
+    space, also available as **world_image** and **world_rect**. Their
+    image and rect are then projected on the screen by the camera.
+
+    World sprites with the **cull** attribute set are also indexed in a
+    spatial grid. They are removed from their group when they leave the
+    viewport, so they are neither updated nor drawn, and added back when
+    they enter it again. Hence, culling is meant for sprites that don't
+    move while they are not visible, like the tiles of a map.
+
+    These class attributes may be useful to override:
+     - **cell_size** : size of the grid cells, in pixels (default is 256)
+     - **margin** : margin around the viewport before a sprite is culled,
+       in screen pixels (default is 0)
+    """
+
+    cell_size = 256
+    margin = 0
+
+    def __init__(self, view):
+        self.view = view
+        self.viewport = view.screen.get_rect()
+        self.position = xytuple(*self.viewport.center).map(float)
+        self.zoom = 1.0
+        self.moved = False
+        self.last_transform = None
+        self.grid = SpatialGrid(self.cell_size)
+        self.shown = set()
+        self.hidden = set()
+        self.scaled_cache = Cache(weak=True, name="camera")
+
+    # Transform
+
+    def scroll(self, shift):
+        """Move the camera by a world shift."""
+        self.position += shift
+
+    def move_to(self, pos):
+        """Center the camera on a world position."""
+        self.position = xytuple(*pos).map(float)
+
+    def to_screen(self, pos):
+        """Convert a world position into a screen position."""
+        pos = (xytuple(*pos) - self.position) * (self.zoom, self.zoom)
+        return pos + self.viewport.center
+
+    def to_world(self, pos):
+        """Convert a screen position into a world position."""
+        ratio = 1.0 / self.zoom
+        pos = (xytuple(*pos) - self.viewport.center) * (ratio, ratio)
+        return pos + self.position
+
+    def project_rect(self, rect):
+        """Convert a world rect into a screen rect."""
+        left, top = self.to_screen(rect.topleft).floored()
+        right, bottom = self.to_screen(rect.bottomright).ceiled()
+        return Rect(left, top, right - left, bottom - top)
+
+    def project_image(self, image):
+        """Scale a world image according to the zoom."""
+        if self.zoom == 1:
+            return image
+        size = xytuple(*image.get_size()) * (self.zoom, self.zoom)
+        size = size.ceiled()
+        cached = self.scaled_cache.get(image)
+        if cached is None or cached[0] != size:
+            quality = self.view.settings.scale_quality
+            cached = size, rescale(image, size, quality)
+            self.scaled_cache[image] = cached
+        return cached[1]
+
+    @property
+    def visible_area(self):
+        """The world rect displayed in the viewport."""
+        viewport = self.viewport.inflate(2*self.margin, 2*self.margin)
+        left, top = self.to_world(viewport.topleft).floored()
+        right, bottom = self.to_world(viewport.bottomright)\
+                            .ceiled()
+        return Rect(left, top, right - left, bottom - top)
+
+    # Sprites
+
+    def register(self, sprite):
+        """Register a new culled sprite, visible until its first update."""
+        self.shown.add(sprite)
+
+    def unregister(self, sprite):
+        """Forget a culled sprite."""
+        self.grid.remove(sprite)
+        self.shown.discard(sprite)
+        self.hidden.discard(sprite)
+
+    def update_sprite(self, sprite):
+        """Update a world sprite and project it on the screen."""
+        sprite.world_image = sprite.get_image()
+        sprite.world_rect = Rect(sprite.get_rect())
+        sprite.image = self.project_image(sprite.world_image)
+        # Inlined to_screen, called for every visible sprite
+        x, y = sprite.world_rect.topleft
+        px, py = self.position
+        cx, cy = self.viewport.center
+        topleft = (int(floor((x - px) * self.zoom + cx)),
+                   int(floor((y - py) * self.zoom + cy)))
+        sprite.rect = sprite.image.get_rect(topleft=topleft)
+        sprite.layer = sprite.get_layer()
+        if sprite.cull:
+            self.grid.insert(sprite, sprite.world_rect)
+
+    def cull(self):
+        """Hide the culled sprites out of the viewport and show the others.
+
+        The cost is proportional to the number of visible sprites. It also
+        sets the **moved** attribute if the camera moved since the last
+        call, in which case the whole viewport has to be redrawn.
+        """
+        transform = self.position, self.zoom
+        self.moved = self.last_transform not in (None, transform)
+        self.last_transform = transform
+        visible = self.grid.query(self.visible_area)
+        for sprite in self.shown - visible:
+            if sprite in self.grid:
+                sprite.group.remove(sprite)
+                self.shown.discard(sprite)
+                self.hidden.add(sprite)
+        for sprite in visible - self.shown:
+            sprite.group.add(sprite)
+            sprite.dirty = 1
+            self.hidden.discard(sprite)
+            self.shown.add(sprite)
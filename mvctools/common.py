@@ -1,8 +1,26 @@
 """Module with useful classes and functions."""
 
+import sys
 import operator
+from math import hypot, floor, ceil
 from collections import namedtuple, defaultdict
 from pygame import Color
+from mvctools.cache import cached
+
+
+# Scalar types accepted by the vector operators
+SCALAR_TYPES = frozenset([int, float, type(2**64)])
+
+_new_tuple = tuple.__new__
+
+# Raise an exception recorded with sys.exc_info, like the error of a thread,
+# with its original traceback
+if sys.version_info[0] < 3:
+    exec("def reraise(cls, value, traceback):\n"
+         "    raise cls, value, traceback\n")
+else:
+    def reraise(cls, value, traceback):
+        raise value.with_traceback(traceback)
 
 
 class xytuple(namedtuple("xytuple",("x","y"))):
@@ -12,41 +30,226 @@ class xytuple(namedtuple("xytuple",("x","y"))):
      - addition and inplace addition (+, +=)
      - substraction and inplace substraction (-, -=)
      - multiplication and inplace multiplication (* , * =)
-     - division and inplace division (/, /=)
+     - division and inplace division (/, /=, //, //=)
 
     These are all term-to-term operations.
-    Hence, the argument has two be a two-elements iterable.
-    They all return an xytuple.
+    Hence, the argument has two be a two-elements iterable or a number,
+    applied to both coordinates. They all return an xytuple.
 
     Also, the absolute value operation is supported (abs).
     It returned a float corrsponding to the norm of the coordinates.
 
     To apply a specific function on both coordinates, use the method map.
-    It returns an xytuple.
+    It returns an xytuple. The common integer conversions are available
+    as the methods truncated, rounded, floored and ceiled.
     """
-    
-    __add__ = __iadd__ = lambda self, it: xytuple(*map(operator.add, self, it))
-    __add__.__doc__ = """Add a 2-elements iterable and return an xytuple.
-                      """
-    __sub__ = __isub__ = lambda self, it: xytuple(*map(operator.sub, self, it))
-    __sub__.__doc__ = """Substract a 2-elements iterable and return an xytuple.
-                      """
-    __mul__ = __imul__ = lambda self, it: xytuple(*map(operator.mul, self, it))
-    __mul__.__doc__ = """Product by a 2-elements iterable and return an xytuple.
-                      """
-    __div__ = __idiv__ = lambda self, it: xytuple(*map(operator.div, self, it))
-    __div__.__doc__ = """Divide by a 2-elements iterable and return an xytuple.
-                      """
-    __neg__ = lambda self: self * (-1,-1)
-    __neg__.__doc__ = """Return the additive inverse of an xytuple.
-                      """
-    __abs__ = lambda self: abs(complex(*self))
-    __abs__.__doc__ = """Return a float, the norm of the coordinates.
-                      """
+
+    __slots__ = ()
+
+    def __add__(self, it):
+        """Add a 2-elements iterable and return an xytuple."""
+        x, y = self
+        if it.__class__ in SCALAR_TYPES:
+            return _new_tuple(xytuple, (x + it, y + it))
+        a, b = it
+        return _new_tuple(xytuple, (x + a, y + b))
+
+    def __sub__(self, it):
+        """Substract a 2-elements iterable and return an xytuple."""
+        x, y = self
+        if it.__class__ in SCALAR_TYPES:
+            return _new_tuple(xytuple, (x - it, y - it))
+        a, b = it
+        return _new_tuple(xytuple, (x - a, y - b))
+
+    def __mul__(self, it):
+        """Product by a 2-elements iterable and return an xytuple."""
+        x, y = self
+        if it.__class__ in SCALAR_TYPES:
+            return _new_tuple(xytuple, (x * it, y * it))
+        a, b = it
+        return _new_tuple(xytuple, (x * a, y * b))
+
+    def __div__(self, it):
+        """Divide by a 2-elements iterable and return an xytuple."""
+        x, y = self
+        if it.__class__ in SCALAR_TYPES:
+            return _new_tuple(xytuple, (operator.div(x, it),
+                                        operator.div(y, it)))
+        a, b = it
+        return _new_tuple(xytuple, (operator.div(x, a), operator.div(y, b)))
+
+    def __truediv__(self, it):
+        """True division by a 2-elements iterable, returning an xytuple."""
+        x, y = self
+        if it.__class__ in SCALAR_TYPES:
+            a = b = it
+        else:
+            a, b = it
+        return _new_tuple(xytuple, (operator.truediv(x, a),
+                                    operator.truediv(y, b)))
+
+    def __floordiv__(self, it):
+        """Floor division by a 2-elements iterable, returning an xytuple."""
+        x, y = self
+        if it.__class__ in SCALAR_TYPES:
+            return _new_tuple(xytuple, (x // it, y // it))
+        a, b = it
+        return _new_tuple(xytuple, (x // a, y // b))
+
+    __iadd__ = __add__
+    __isub__ = __sub__
+    __imul__ = __mul__
+    __idiv__ = __div__
+    __itruediv__ = __truediv__
+    __ifloordiv__ = __floordiv__
+
+    if not hasattr(operator, "div"):
+        __div__ = __idiv__ = __truediv__
+
+    def __neg__(self):
+        """Return the additive inverse of an xytuple."""
+        x, y = self
+        return _new_tuple(xytuple, (-x, -y))
+
+    def __abs__(self):
+        """Return a float, the norm of the coordinates."""
+        return hypot(*self)
 
     def map(self, func):
         """Map the coordinates with the given function a return an xytuple."""
-        return xytuple(*map(func, self))
+        x, y = self
+        return _new_tuple(xytuple, (func(x), func(y)))
+
+    def truncated(self):
+        """Return the coordinates converted to int, as an xytuple."""
+        x, y = self
+        return _new_tuple(xytuple, (int(x), int(y)))
+
+    def rounded(self):
+        """Return the rounded coordinates as integers, in an xytuple."""
+        x, y = self
+        return _new_tuple(xytuple, (int(round(x)), int(round(y))))
+
+    def floored(self):
+        """Return the floor of the coordinates as integers, in an xytuple."""
+        x, y = self
+        return _new_tuple(xytuple, (int(floor(x)), int(floor(y))))
+
+    def ceiled(self):
+        """Return the ceiling of the coordinates as integers, in an xytuple."""
+        x, y = self
+        return _new_tuple(xytuple, (int(ceil(x)), int(ceil(y))))
+
+
+class xyvector(object):
+    """Mutable x,y coordinates.
+
+    It supports the same operators as xytuple, returning xyvectors, but
+    the inplace operators modify the vector instead of building a new one.
+    Use it for the coordinates updated several times per frame, and
+    convert it with the method xy before sharing it.
+    """
+
+    __slots__ = ("x", "y")
+
+    def __init__(self, x=0, y=0):
+        self.x = x
+        self.y = y
+
+    def __iter__(self):
+        yield self.x
+        yield self.y
+
+    def __len__(self):
+        return 2
+
+    def __getitem__(self, index):
+        return (self.x, self.y)[index]
+
+    def __eq__(self, it):
+        try:
+            a, b = it
+        except (TypeError, ValueError):
+            return False
+        return self.x == a and self.y == b
+
+    def __ne__(self, it):
+        return not self == it
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "xyvector(x={!r}, y={!r})".format(self.x, self.y)
+
+    @staticmethod
+    def _pair(it):
+        if it.__class__ in SCALAR_TYPES:
+            return it, it
+        return it
+
+    def __add__(self, it):
+        a, b = self._pair(it)
+        return xyvector(self.x + a, self.y + b)
+
+    def __sub__(self, it):
+        a, b = self._pair(it)
+        return xyvector(self.x - a, self.y - b)
+
+    def __mul__(self, it):
+        a, b = self._pair(it)
+        return xyvector(self.x * a, self.y * b)
+
+    def __truediv__(self, it):
+        a, b = self._pair(it)
+        return xyvector(operator.truediv(self.x, a),
+                        operator.truediv(self.y, b))
+
+    def __iadd__(self, it):
+        a, b = self._pair(it)
+        self.x += a
+        self.y += b
+        return self
+
+    def __isub__(self, it):
+        a, b = self._pair(it)
+        self.x -= a
+        self.y -= b
+        return self
+
+    def __imul__(self, it):
+        a, b = self._pair(it)
+        self.x *= a
+        self.y *= b
+        return self
+
+    def __itruediv__(self, it):
+        a, b = self._pair(it)
+        self.x = operator.truediv(self.x, a)
+        self.y = operator.truediv(self.y, b)
+        return self
+
+    __div__ = __truediv__
+    __idiv__ = __itruediv__
+
+    def __neg__(self):
+        return xyvector(-self.x, -self.y)
+
+    def __abs__(self):
+        return hypot(self.x, self.y)
+
+    def set(self, x, y):
+        """Set both coordinates and return the vector."""
+        self.x = x
+        self.y = y
+        return self
+
+    def copy(self):
+        return xyvector(self.x, self.y)
+
+    def xy(self):
+        """Return the coordinates as an xytuple."""
+        return _new_tuple(xytuple, (self.x, self.y))
 
 
 class cursoredlist(list):
@@ -96,24 +299,22 @@ class cursoredlist(list):
 
 
 class cachedict(defaultdict):
+    """Unbounded cache dictionary, kept for compatibility.
+
+    See **mvctools.cache.Cache** for bounded caches with statistics.
+    """
 
     def __missing__(self, key):
         if isinstance(key, tuple):
             self[key] = self.default_factory(*key)
         else:
-            self[key] = self.default_factory(index)
+            self[key] = self.default_factory(key)
         return self[key]
 
 
 def cache(func):
-    dct = {}
-    def wrapper(arg):
-        if arg not in dct:
-            dct[arg] = func(arg)
-        return dct[arg]
-    wrapper.__doc__ = func.__doc__
-    wrapper.__name__ = func.__name__
-    return wrapper
+    """Unbounded cache decorator (see **mvctools.cache.cached**)."""
+    return cached()(func)
 
 class Color(Color):
     """TODO: Enhanced version of pygame.Color."""
@@ -1,11 +1,26 @@
 """Module for the state control related objects."""
 
 # Imports
-import pygame, sys
+import pygame, sys, os, threading
 from mvctools.gamedata import BaseGamedata
 from mvctools.state import BaseState, NextStateException
 from mvctools.settings import BaseSettings
-from mvctools.resource import ResourceHandler
+from mvctools.resource import ResourceHandler, ResourcePack, resource_path
+from mvctools.resource import ResourceManifest, ResourceTracer
+from mvctools.display import DisplayBackend
+from mvctools.scheduler import Job
+from mvctools.common import reraise
+
+
+# Helpers
+def _overrides_init(state):
+    """Check whether a state class overrides BaseState.__init__."""
+    for cls in state.__mro__:
+        if cls is BaseState:
+            return False
+        if "__init__" in vars(cls):
+            return True
+    return True
 
 
 # Base class
@@ -20,16 +35,28 @@ class BaseControl:
      - **self.settings**: the game settings
      - **self.gamedata**: the data shared between the states
      - **self.resource**: the game resources
+     - **self.display**: the display backend
 
     These class attributes may be useful to override:
      - **settings_class** : Class to handle the settings
        (default is BaseSettings)
      - **gamedata_class** : Class to handle the settings
        (default is BaseGamedata)
+     - **display_class** : Class of the display backend, for instance
+       **mvctools.display.OffscreenBackend** to render without a display,
+       or **mvctools.display.RendererBackend** to draw from textures
+       (default is DisplayBackend)
      - **fist_state** : Class of the first state to instantiate and run.
        (default is None)
      - **resource_dict** : name of the resource folder
        (default is "resource")
+     - **resource_pack** : name of a pack built from the resource folder
+       with **mvctools.resource.build_pack**, used instead of the folder
+       if it exists (default is None)
+     - **resource_manifest** : name of the manifest listing the resources
+       requested by each state (default is None)
+     - **trace_resources** : record the resources requested by each state
+       and write them to the manifest on exit (default is False)
      - **window_title** : title of the window
        (default is "Pygame")
      - **display_fps** : display the fps rate in the window title
@@ -43,6 +70,10 @@ class BaseControl:
      - **push_current_state** : push the current state into the stack
      - **register_next_state** : register the class of the next state to
        instantiate and run
+     - **preload** : load the resources listed in the manifest for a
+       given state
+     - **prepare_next_state** : build a state ahead of time, so the
+       transition only hands the prepared instance over
     
     Some important points to know about the control creating the next state:
      - The registered state is automatically unregistered when instanciated
@@ -70,38 +101,231 @@ class BaseControl:
     # Class attributes
     settings_class = BaseSettings
     gamedata_class = BaseGamedata
+    display_class = DisplayBackend
     first_state = None
     resource_dict = "resource"
+    resource_pack = None
+    resource_manifest = None
+    trace_resources = False
     window_title = "Pygame"
     display_fps = True
     
     def __init__(self):
         """Initialize the state control."""
         self.next_state = self.first_state
+        self.display = self.display_class()
         self.settings = self.settings_class(self)
         self.gamedata = self.gamedata_class()
-        self.resource = ResourceHandler(self.resource_dict)
+        self.manifest = self.read_manifest()
+        self.resource = self.build_resource()
+        self.tracer = ResourceTracer() if self.trace_resources else None
+        self.resource.trace(self.tracer)
         self.current_state = None
         self.state_stack = []
+        self.prepared_states = {}
+
+    def build_resource(self):
+        """Build the resource handler, from the pack if available.
+
+        The image conversion modes stored in the pack and the manifest are
+        shared with the handler, so the images are not analyzed again.
+        """
+        pack = None
+        if self.resource_pack:
+            filename = resource_path(self.resource_pack)
+            if os.path.isfile(filename):
+                pack = ResourcePack(filename)
+        conversions = self.manifest.conversions
+        if pack:
+            conversions.update(pack.conversions)
+        return ResourceHandler(self.resource_dict, pack,
+                               conversions=conversions)
+
+    def read_manifest(self):
+        """Read the resource manifest if available."""
+        if self.resource_manifest:
+            filename = resource_path(self.resource_manifest)
+            if os.path.isfile(filename):
+                return ResourceManifest.read(filename)
+        return ResourceManifest()
+
+    def write_manifest(self):
+        """Write the traced resources to the manifest."""
+        if self.tracer and self.resource_manifest:
+            self.manifest.update(self.tracer.get_manifest())
+            self.manifest.write(self.resource_manifest)
+
+    def preload(self, state, threaded=False, callback=None):
+        """Preload the resources requested by a state.
+
+        The whole resource tree is loaded if the state is not listed in
+        the manifest.
+
+        Args:
+            state (type): the class of the state
+            threaded (bool): load the resources in a separate thread
+            callback (func): function to call once loaded
+        """
+        if state not in self.manifest:
+            return self.resource.load(threaded=threaded, callback=callback)
+        entries = self.manifest.get(state)
+        return self.resource.preload(entries, threaded, callback)
+
+    def prepare_next_state(self, state, threaded=False, callback=None,
+                           scheduler=None):
+        """Prepare an instance of a state before it is registered.
+
+        The resources requested by the state are preloaded, then the state
+        is built step by step (model, controller, view and sprites) as a job
+        of a scheduler, so it only takes a slice of each tick. Once the
+        state is registered, the prepared instance is used instead of a new
+        one, and the remaining steps are completed if needed. A state class
+        overriding **__init__** is built by its constructor, in one step.
+
+        The state is built with the gamedata of the time: the preparation
+        should start once the data it depends on is settled, or be
+        discarded with discard_prepared_state.
+
+        Args:
+            state (type): the class of the state
+            threaded (bool): load the resources in a separate thread
+                instead of time slices
+            callback (func): function to call once prepared
+            scheduler (Scheduler): scheduler running the job
+                (default is the scheduler of the current state)
+        Return:
+            Job: the preparation job
+        """
+        self.discard_prepared_state(state)
+        instance = state.__new__(state)
+        loaded = threading.Event()
+        loaded.error = None
+        iterator = self.iter_preload(state)
+        if threaded:
+            thread = threading.Thread(target=self._preload_thread,
+                                      args=(iterator, loaded))
+            thread.start()
+            iterator = iter(())
+        else:
+            loaded.set()
+        def done(job):
+            if callable(callback):
+                callback()
+        steps = self._prepare_steps(instance, iterator, loaded)
+        job = Job(self._traced(state, steps), callback=done,
+                  name=state.__name__)
+        job.instance = instance
+        self.prepared_states[state] = job, loaded
+        if scheduler is None and self.current_state:
+            scheduler = self.current_state.scheduler
+        if scheduler is None:
+            job.finish()
+        else:
+            scheduler.add(job)
+        return job
+
+    def iter_preload(self, state):
+        """Return an iterator loading a resource of a state per step.
+
+        The whole resource tree is loaded if the state is not listed in
+        the manifest.
+        """
+        if state not in self.manifest:
+            return self.resource.iterload()
+        return self.resource.iterload(self.manifest.get(state))
+
+    def discard_prepared_state(self, state):
+        """Discard the prepared instance of a state, if any."""
+        job, loaded = self.prepared_states.pop(state, (None, None))
+        if job is None:
+            return
+        job.cancel()
+        view = getattr(job.instance, "view", None)
+        if view:
+            view.close()
+
+    def pop_prepared_state(self, state):
+        """Return the prepared instance of a state, or None.
+
+        The preparation is completed if it is still pending.
+        """
+        job, loaded = self.prepared_states.pop(state, (None, None))
+        if job is None:
+            return None
+        loaded.wait()
+        job.finish()
+        return job.instance
+
+    def _preload_thread(self, iterator, loaded):
+        # Load the resources, the error is raised by the preparation job
+        try:
+            for _ in iterator:
+                pass
+        except Exception:
+            loaded.error = sys.exc_info()
+        finally:
+            loaded.set()
+
+    def _prepare_steps(self, instance, iterator, loaded):
+        # Resources, a file per step
+        for _ in iterator:
+            yield 0.
+        while not loaded.is_set():
+            yield 0.
+        if loaded.error is not None:
+            reraise(*loaded.error)
+        # Model, controller and view
+        if _overrides_init(type(instance)):
+            instance.__init__(self)
+            yield 0.9
+        else:
+            for progress in instance.build(self):
+                yield 0.9 * progress
+        # Sprites of the initial models
+        instance.view.gen_sprites()
+        yield 1.
+
+    def _traced(self, state, steps):
+        # Attribute the requests of each step to the prepared state
+        steps = iter(steps)
+        while True:
+            previous = self.tracer.state if self.tracer else None
+            self.trace_state(state)
+            try:
+                value = next(steps)
+            except StopIteration:
+                return
+            finally:
+                self.trace_state(previous)
+            yield value
 
     def load_next_state(self):
         """Load the next state.
 
         Note the following:
          - The registered state is automatically unregistered when instanciated
+         - The prepared instance of the registered state is used if any
          - If no state is registered, the next state is poped from the stack
          - In that case, if the stack is empty, the program ends properly
         """
         if self.next_state:
-            self.current_state = self.next_state(self)
+            prepared = self.pop_prepared_state(self.next_state)
+            self.trace_state(self.next_state)
+            self.current_state = prepared or self.next_state(self)
             self.next_state = None
         elif self.state_stack:
             self.current_state = self.pop_state()
+            self.trace_state(type(self.current_state))
             self.reload()
         else:
             self.current_state = None
         return self.current_state
 
+    def trace_state(self, state):
+        """Attribute the next resource requests to the given state class."""
+        if self.tracer:
+            self.tracer.state = state
+
     def reload(self):
         """Reload current state."""
         if self.current_state:
@@ -124,6 +348,8 @@ class BaseControl:
                 self.current_state.run()
             except SystemExit:
                 break
+        # Save the resource manifest
+        self.write_manifest()
         # Exit safely
         self.safe_exit()
 
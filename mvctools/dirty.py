@@ -0,0 +1,135 @@
+"""Module for the dirty region manager used by the views."""
+
+from pygame import Rect
+from timeit import default_timer
+from mvctools.display import DisplayBackend
+
+
+def area(rect):
+    """Return the area of a rect."""
+    return rect.width * rect.height
+
+
+class DirtyRegionManager(object):
+    """Merge the dirty rects of each frame and update the display.
+
+    Two rects are merged when the extra pixels covered by their union cost
+    less than the overhead of an additional rect. The whole display is
+    flipped when the dirty area goes above a threshold, learned from the
+    measured costs of partial updates and full flips.
+
+    These class attributes may be useful to override:
+     - **rect_cost** : overhead of a rect, in pixels (default is 2000)
+     - **max_rects** : above this number of rects, they are merged into
+       their bounding rect instead (default is 64)
+     - **flip_ratio** : initial threshold, as a ratio of the display area
+       (default is 1.0)
+     - **smoothing** : weight of the last measure in the averaged costs
+       (default is 0.1)
+
+    The **stats** attribute is a dictionary with the following keys:
+     - **frames** : number of updated frames
+     - **flips** : number of full flips
+     - **rects_in** : number of rects received
+     - **rects_out** : number of rects passed to the display
+     - **dirty_area** : number of pixels updated
+     - **flip_area** : current threshold, in pixels
+     - **pixel_time** : averaged update time per pixel
+     - **flip_time** : averaged full flip time
+    """
+
+    rect_cost = 2000
+    max_rects = 64
+    flip_ratio = 1.0
+    smoothing = 0.1
+
+    def __init__(self, screen_rect, backend=None):
+        self.screen_rect = Rect(screen_rect)
+        self.backend = backend or DisplayBackend()
+        self.flip_area = self.flip_ratio * area(self.screen_rect)
+        self.pixel_time = None
+        self.flip_time = None
+        self.stats = dict.fromkeys(("frames", "flips", "rects_in",
+                                    "rects_out", "dirty_area"), 0)
+        self._update_stats()
+
+    def merge(self, rects):
+        """Merge the rects according to the cost model.
+
+        Args:
+            rects (list): the dirty rects
+        Return:
+            list: the merged rects, clipped to the display
+        """
+        if len(rects) > self.max_rects:
+            rect = Rect(rects[0]).unionall(rects[1:])
+            rect = self.screen_rect.clip(rect)
+            return [rect] if area(rect) else []
+        merged = []
+        for rect in rects:
+            rect = self.screen_rect.clip(rect)
+            if not area(rect):
+                continue
+            index = 0
+            while index < len(merged):
+                other = merged[index]
+                union = rect.union(other)
+                waste = area(union) - area(rect) - area(other)
+                waste += area(rect.clip(other))
+                if waste <= self.rect_cost:
+                    rect = union
+                    del merged[index]
+                    index = 0
+                else:
+                    index += 1
+            merged.append(rect)
+        return merged
+
+    def update(self, rects):
+        """Update the display with the given dirty rects.
+
+        Args:
+            rects (list): the dirty rects
+        Return:
+            list: the rects passed to the display
+        """
+        rects = list(rects)
+        merged = self.merge(rects)
+        dirty_area = sum(area(rect) for rect in merged)
+        full = dirty_area >= self.flip_area
+        if full:
+            merged = [Rect(self.screen_rect)]
+            dirty_area = area(self.screen_rect)
+        # Update display
+        start = default_timer()
+        if full:
+            self.backend.flip()
+        else:
+            self.backend.update(merged)
+        elapsed = default_timer() - start
+        # Learn costs
+        if full:
+            self.flip_time = self._average(self.flip_time, elapsed)
+        elif dirty_area:
+            self.pixel_time = self._average(self.pixel_time,
+                                            elapsed/dirty_area)
+        if self.flip_time and self.pixel_time:
+            self.flip_area = self.flip_time / self.pixel_time
+        # Stats
+        self.stats["frames"] += 1
+        self.stats["flips"] += full
+        self.stats["rects_in"] += len(rects)
+        self.stats["rects_out"] += len(merged)
+        self.stats["dirty_area"] += dirty_area
+        self._update_stats()
+        return merged
+
+    def _average(self, current, value):
+        if current is None:
+            return value
+        return current + self.smoothing * (value - current)
+
+    def _update_stats(self):
+        self.stats["flip_area"] = self.flip_area
+        self.stats["pixel_time"] = self.pixel_time
+        self.stats["flip_time"] = self.flip_time
@@ -0,0 +1,350 @@
+"""Module for the display backends used by the control."""
+
+import os
+import zlib
+import tempfile
+import pygame as pg
+from weakref import WeakKeyDictionary
+from collections import deque
+from pygame import Rect, Surface
+from mvctools.resource import analyze_alpha, ALPHA
+
+try:
+    from cStringIO import StringIO as BytesIO
+except ImportError:
+    from io import BytesIO
+
+try:
+    from pygame._sdl2 import video
+except ImportError:
+    video = None
+
+
+# Capture formats
+RAW = "raw"
+PNG = "png"
+
+
+def encode_png(surface):
+    """Return the content of a PNG file for the given surface."""
+    stream = BytesIO()
+    try:
+        pg.image.save(surface, stream, "frame.png")
+        return stream.getvalue()
+    except TypeError:
+        pass
+    # Older pygame versions only write PNG files to a filename
+    handle, filename = tempfile.mkstemp(suffix=".png")
+    os.close(handle)
+    try:
+        pg.image.save(surface, filename)
+        with open(filename, "rb") as stream:
+            return stream.read()
+    finally:
+        os.remove(filename)
+
+
+class DisplayBackend(object):
+    """Backend drawing on the pygame display.
+
+    The views draw on the surface returned by **get_surface**, and pass
+    their dirty rects to **update**.
+    """
+
+    def set_mode(self, size, flags=0):
+        """Set the video mode and return the surface to draw on."""
+        return pg.display.set_mode(size, flags)
+
+    def get_surface(self):
+        """Return the surface to draw on, or None if no mode is set."""
+        return pg.display.get_surface()
+
+    def update(self, rects):
+        """Update the given areas of the display."""
+        if rects:
+            pg.display.update(rects)
+
+    def flip(self):
+        """Update the whole display."""
+        pg.display.flip()
+
+    def set_caption(self, caption):
+        """Set the window title."""
+        pg.display.set_caption(caption)
+
+
+class Frame(object):
+    """Frame captured by the offscreen backend.
+
+    Attributes:
+     - **index** : index of the frame
+     - **checksum** : CRC32 of the whole surface
+     - **rects** : the updated areas
+     - **data** : the captured pixels (raw RGB strings or PNG files, one
+       per rect) or None if the capture is disabled
+    """
+
+    __slots__ = ("index", "checksum", "rects", "data")
+
+    def __init__(self, index, checksum, rects, data):
+        self.index = index
+        self.checksum = checksum
+        self.rects = rects
+        self.data = data
+
+
+class OffscreenBackend(DisplayBackend):
+    """Backend drawing on an offscreen surface, for headless machines.
+
+    The dummy SDL video driver is selected if no other driver is set, and
+    a 1x1 video mode is set so the images can still be converted. Each
+    update records a Frame in the **frames** deque, which only keeps the
+    last frames. The **count** attribute is the number of frames recorded.
+
+    Args:
+        capture (str): None, RAW or PNG (default is None)
+        regions (bool): only capture the updated areas instead of the
+            whole surface (default is False)
+        checksums (bool): compute the CRC32 of each frame
+            (default is False)
+        depth (int): depth of the offscreen surface (default is 32)
+        max_frames (int or None): number of frames kept, None for all
+            of them (default is 1000)
+    """
+
+    def __init__(self, capture=None, regions=False, checksums=False,
+                 depth=32, max_frames=1000):
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        self.capture = capture
+        self.regions = regions
+        self.checksums = checksums
+        self.depth = depth
+        self.surface = None
+        self.frames = deque(maxlen=max_frames)
+        self.count = 0
+        self.caption = None
+
+    def set_mode(self, size, flags=0):
+        if not pg.display.get_surface():
+            pg.display.set_mode((1, 1), 0, self.depth)
+        self.surface = Surface(size, 0, self.depth)
+        return self.surface
+
+    def get_surface(self):
+        return self.surface
+
+    def update(self, rects):
+        rects = [Rect(rect) for rect in rects]
+        self.record(rects)
+
+    def flip(self):
+        self.record([self.surface.get_rect()])
+
+    def set_caption(self, caption):
+        self.caption = caption
+
+    def record(self, rects):
+        """Record a frame for the given updated areas."""
+        checksum = None
+        if self.checksums:
+            string = pg.image.tostring(self.surface, "RGB")
+            checksum = zlib.crc32(string) & 0xffffffff
+        data = None
+        if self.capture:
+            areas = rects if self.regions else [self.surface.get_rect()]
+            data = [self.dump(self.surface.subsurface(area))
+                    for area in areas]
+        frame = Frame(self.count, checksum, rects, data)
+        self.frames.append(frame)
+        self.count += 1
+        return frame
+
+    def dump(self, surface):
+        """Return the pixels of a surface in the capture format."""
+        if self.capture == RAW:
+            return pg.image.tostring(surface, "RGB")
+        if self.capture == PNG:
+            return encode_png(surface)
+        raise ValueError("Unknown capture format: {}".format(self.capture))
+
+    def get_checksums(self):
+        """Return the list of the checksums of the frames kept."""
+        return [frame.checksum for frame in self.frames]
+
+    def save(self, directory, prefix="frame"):
+        """Write the captured frames as a PNG sequence.
+
+        Only full frames are written, that is when the capture is enabled
+        and the regions option is disabled.
+        """
+        size = self.surface.get_size()
+        for frame in self.frames:
+            if not frame.data or self.regions:
+                continue
+            name = "{}{:05d}.png".format(prefix, frame.index)
+            filename = os.path.join(directory, name)
+            if self.capture == PNG:
+                with open(filename, "wb") as stream:
+                    stream.write(frame.data[0])
+            else:
+                image = pg.image.fromstring(frame.data[0], size, "RGB")
+                pg.image.save(image, filename)
+
+
+class RendererBackend(DisplayBackend):
+    """Backend drawing with the SDL2 renderer, from cached textures.
+
+    It requires **pygame._sdl2.video**, available from pygame 2. Otherwise,
+    it behaves exactly like the DisplayBackend.
+
+    The views with no logical size and no render thread pass their sprites
+    to **render**, instead of blitting them on the display surface. The
+    images are uploaded once as textures, cached by surface identity, so
+    the sprites have to replace their images instead of drawing on them.
+    The other views draw on the surface returned by **get_surface**, and
+    the updated areas are uploaded to a single frame texture.
+
+    SDL blends the translucent pixels with its own rounding, which differs
+    from the software blits by a few levels per channel. Hence, by default,
+    the views with translucent sprites are drawn in software. The renderer
+    still draws the opaque, colorkey and binary alpha images exactly as
+    the blits do.
+
+    The renderer batches the draw calls of a frame, as long as the
+    SDL_RENDER_BATCHING hint is not disabled. The software renderer is
+    used on machines with no acceleration, or if the SDL_RENDER_DRIVER
+    environment variable is set to "software".
+
+    Args:
+        accelerated (int): -1 for any renderer, 0 for the software
+            renderer, 1 for a hardware renderer (default is -1)
+        vsync (bool): synchronize the present calls with the screen
+            refresh (default is False)
+        exact (bool): only draw from textures the frames the renderer
+            blends exactly as the blits (default is True)
+    """
+
+    def __init__(self, accelerated=-1, vsync=False, exact=True):
+        os.environ.setdefault("SDL_RENDER_BATCHING", "1")
+        self.accelerated = accelerated
+        self.vsync = vsync
+        self.exact = exact
+        self.window = None
+        self.renderer = None
+        self.surface = None
+        self.frame_texture = None
+        self.texture_dct = WeakKeyDictionary()
+        self.exact_dct = WeakKeyDictionary()
+
+    @property
+    def textured(self):
+        """True if the sprites can be drawn from textures."""
+        return self.renderer is not None
+
+    def set_mode(self, size, flags=0):
+        if video is None:
+            return DisplayBackend.set_mode(self, size, flags)
+        # Hidden display mode, so the images can still be converted
+        if not pg.display.get_surface():
+            pg.display.set_mode((1, 1), getattr(pg, "HIDDEN", 0))
+        fullscreen = bool(flags & pg.FULLSCREEN)
+        if self.window is None:
+            self.window = video.Window(size=size, fullscreen=fullscreen)
+            self.renderer = video.Renderer(self.window,
+                                           accelerated=self.accelerated,
+                                           vsync=self.vsync)
+        else:
+            self.window.size = size
+            if fullscreen:
+                self.window.set_fullscreen()
+            else:
+                self.window.set_windowed()
+        self.window.show()
+        self.surface = Surface(size, 0, 32).convert()
+        self.frame_texture = None
+        return self.surface
+
+    def get_surface(self):
+        if self.renderer is None:
+            return DisplayBackend.get_surface(self)
+        return self.surface
+
+    def update(self, rects):
+        if self.renderer is None:
+            return DisplayBackend.update(self, rects)
+        if not rects:
+            return
+        if self.frame_texture is None:
+            self.frame_texture = video.Texture.from_surface(
+                self.renderer, self.surface)
+        else:
+            bounds = self.surface.get_rect()
+            for rect in rects:
+                rect = bounds.clip(rect)
+                if rect:
+                    self.frame_texture.update(self.surface.subsurface(rect),
+                                              rect)
+        self.frame_texture.draw()
+        self.renderer.present()
+
+    def flip(self):
+        if self.renderer is None:
+            return DisplayBackend.flip(self)
+        self.update([self.surface.get_rect()])
+
+    def set_caption(self, caption):
+        if self.window is None:
+            return DisplayBackend.set_caption(self, caption)
+        self.window.title = caption
+
+    def get_texture(self, surface, refresh=False):
+        """Return the texture of a surface, uploaded on the first call.
+
+        Args:
+            surface (Surface): the source image
+            refresh (bool): upload the surface again, if it has been drawn
+                on since the texture was created (default is False)
+        """
+        texture = self.texture_dct.get(surface)
+        if texture is None:
+            texture = video.Texture.from_surface(self.renderer, surface)
+            self.texture_dct[surface] = texture
+        elif refresh:
+            texture.update(surface)
+        return texture
+
+    def can_render(self, surface):
+        """Check whether the renderer draws a surface as a blit would.
+
+        It is always the case with the exact option disabled. Otherwise,
+        the surfaces with translucent pixels or a surface alpha are
+        excluded. The result is cached by surface identity.
+        """
+        if not self.exact:
+            return True
+        exact = self.exact_dct.get(surface)
+        if exact is None:
+            alpha = surface.get_alpha()
+            exact = alpha in (None, 255) and analyze_alpha(surface) != ALPHA
+            self.exact_dct[surface] = exact
+        return exact
+
+    def render(self, background, sprites, refresh=()):
+        """Draw a whole frame from textures and present it.
+
+        The target is not cleared: the background is expected to cover
+        the whole frame.
+
+        Args:
+            background (Surface): the background of the view
+            sprites (list): the visible sprites, in drawing order
+            refresh (iterable): the surfaces to upload again
+        """
+        for surface in refresh:
+            self.get_texture(surface, refresh=True)
+        renderer = self.renderer
+        self.get_texture(background).draw()
+        for sprite in sprites:
+            texture = self.get_texture(sprite.image)
+            texture.draw(sprite.source_rect, sprite.rect.topleft)
+        renderer.present()
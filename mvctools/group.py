@@ -0,0 +1,354 @@
+"""Module for the sprite groups used by the views."""
+
+from collections import OrderedDict
+from pygame import Surface, Rect
+from pygame.sprite import LayeredUpdates, LayeredDirty
+from pygame.time import get_ticks
+
+
+def draw_order(sprite):
+    """Position of a sprite in the drawing order of a layered group.
+
+    Sprites of equal layers are drawn in the order they joined the layer.
+    """
+    return sprite._layer, getattr(sprite, "sequence", 0)
+
+
+class BufferedLayers(object):
+    """Mixin for layered groups, buffering the layer changes.
+
+    LayeredUpdates.change_layer moves the sprite in the sorted sprite list
+    right away. Here, the new layers are only recorded, and the list is
+    sorted once, the next time it is used. The changed sprites are placed
+    after the other sprites of their layer, in the order of the changes,
+    so the result is the same as a sequence of change_layer calls. The
+    list is mostly sorted from one frame to the next, so the sort runs in
+    about linear time, whatever the number of moving sprites.
+    """
+
+    def __init__(self, *sprites, **kwargs):
+        self._layer_changes = OrderedDict()
+        super(BufferedLayers, self).__init__(*sprites, **kwargs)
+
+    def change_layer(self, sprite, new_layer):
+        self._spritelayers[sprite] = new_layer
+        if hasattr(sprite, "_layer"):
+            sprite._layer = new_layer
+        self._layer_changes.pop(sprite, None)
+        self._layer_changes[sprite] = None
+
+    def apply_layers(self):
+        """Sort the sprite list according to the buffered layer changes."""
+        changes = self._layer_changes
+        if not changes:
+            return
+        sprites = self._spritelist
+        layers = self._spritelayers
+        size = len(sprites)
+        order = dict((sprite, size + index)
+                     for index, sprite in enumerate(changes))
+        entries = [(layers[sprite], order.get(sprite, index), sprite)
+                   for index, sprite in enumerate(sprites)]
+        entries.sort()
+        sprites[:] = [entry[2] for entry in entries]
+        changes.clear()
+
+    def add_internal(self, sprite, layer=None):
+        self.apply_layers()
+        super(BufferedLayers, self).add_internal(sprite, layer)
+
+    def remove_internal(self, sprite):
+        self._layer_changes.pop(sprite, None)
+        super(BufferedLayers, self).remove_internal(sprite)
+
+    def update(self, *args):
+        super(BufferedLayers, self).update(*args)
+        self.apply_layers()
+
+    def sprites(self):
+        self.apply_layers()
+        return super(BufferedLayers, self).sprites()
+
+    def draw(self, *args, **kwargs):
+        self.apply_layers()
+        return super(BufferedLayers, self).draw(*args, **kwargs)
+
+    def get_sprites_at(self, pos):
+        self.apply_layers()
+        return super(BufferedLayers, self).get_sprites_at(pos)
+
+    def get_sprites_from_layer(self, layer):
+        self.apply_layers()
+        return super(BufferedLayers, self).get_sprites_from_layer(layer)
+
+    def get_sprite(self, index):
+        self.apply_layers()
+        return super(BufferedLayers, self).get_sprite(index)
+
+    def get_top_layer(self):
+        self.apply_layers()
+        return super(BufferedLayers, self).get_top_layer()
+
+    def get_bottom_layer(self):
+        self.apply_layers()
+        return super(BufferedLayers, self).get_bottom_layer()
+
+    def get_top_sprite(self):
+        self.apply_layers()
+        return super(BufferedLayers, self).get_top_sprite()
+
+
+class BufferedGroup(BufferedLayers, LayeredDirty):
+    """Dirty sprite group buffering the layer changes."""
+
+    def change_layer(self, sprite, new_layer):
+        super(BufferedGroup, self).change_layer(sprite, new_layer)
+        if sprite.dirty == 0:
+            sprite.dirty = 1
+
+
+class StaticGroup(BufferedLayers, LayeredUpdates):
+    """Group of static sprites, composited once into a cached surface.
+
+    The cache holds the background and the static sprites, in layer order.
+    It is used as the background of the dynamic sprites, and only the
+    areas of the static sprites added, removed or flagged as dirty are
+    recomposed. The few dirty areas where a static sprite covers a dynamic
+    sprite are then repaired, so the layer order is preserved.
+    """
+
+    def __init__(self, *sprites, **kwargs):
+        self.cache = None
+        self._rect_dct = {}
+        self._changed_rects = []
+        self._statics = []
+        super(StaticGroup, self).__init__(*sprites, **kwargs)
+
+    def add_internal(self, sprite, layer=None):
+        super(StaticGroup, self).add_internal(sprite, layer)
+        self._statics = None
+
+    def remove_internal(self, sprite):
+        super(StaticGroup, self).remove_internal(sprite)
+        self._statics = None
+        if sprite in self._rect_dct:
+            self._changed_rects.append(self._rect_dct.pop(sprite))
+
+    def invalidate(self):
+        """Rebuild the whole cache on the next composition."""
+        self.cache = None
+
+    def compose(self, background, size):
+        """Update the cache.
+
+        Args:
+            background (Surface or None): the background of the view
+            size (tuple): size of the cache if there is no background
+        Return:
+            list: the areas that changed in the cache
+        """
+        sprites = self.sprites()
+        # No static sprite
+        if not sprites:
+            self._changed_rects = []
+            if self.cache is None:
+                return []
+            self.cache = None
+            return [Rect((0, 0), size)]
+        # Full build
+        if self.cache is None:
+            if background is None:
+                self.cache = Surface(size).convert()
+            else:
+                self.cache = background.copy()
+            self._changed_rects = []
+            self._draw(sprites)
+            return [self.cache.get_rect()]
+        # Changed areas
+        rects = self._changed_rects
+        self._changed_rects = []
+        for sprite in sprites:
+            if sprite.dirty or sprite not in self._rect_dct:
+                if sprite in self._rect_dct:
+                    rects.append(self._rect_dct[sprite])
+                rects.append(Rect(sprite.rect))
+        if not rects:
+            return []
+        # Recompose the changed areas
+        sprite_rects = [sprite.rect for sprite in sprites]
+        for rect in rects:
+            self.cache.set_clip(rect)
+            if background is None:
+                self.cache.fill((0, 0, 0))
+            else:
+                self.cache.blit(background, rect, rect)
+            indexes = sorted(rect.collidelistall(sprite_rects))
+            self._draw([sprites[index] for index in indexes])
+        self.cache.set_clip(None)
+        return rects
+
+    def _draw(self, sprites):
+        for sprite in sprites:
+            if sprite.visible:
+                self.cache.blit(sprite.image, sprite.rect, sprite.source_rect)
+            self._rect_dct[sprite] = Rect(sprite.rect)
+            if sprite.dirty == 1:
+                sprite.dirty = 0
+
+    def repair(self, surface, background, group, rects):
+        """Redraw the dirty areas where a static sprite covers a dynamic one.
+
+        Args:
+            surface (Surface): the surface the dynamic sprites are drawn on
+            background (Surface or None): the background of the view
+            group (Group): the group of dynamic sprites
+            rects (list): the dirty rects
+        """
+        if not rects:
+            return
+        if self._statics is None:
+            self._statics = [sprite for sprite in self.sprites()
+                             if sprite.visible]
+        statics = self._statics
+        dynamics = [sprite for sprite in group.sprites() if sprite.visible]
+        if not statics or not dynamics:
+            return
+        static_rects = [sprite.rect for sprite in statics]
+        dynamic_rects = [sprite.rect for sprite in dynamics]
+        for rect in rects:
+            covered = [dynamics[i] for i in rect.collidelistall(dynamic_rects)]
+            if not covered:
+                continue
+            covering = [statics[i] for i in rect.collidelistall(static_rects)]
+            # Areas where a static sprite is above a dynamic sprite
+            areas = []
+            for dynamic in covered:
+                area = rect.clip(dynamic.rect)
+                above = [static.rect for static in covering
+                         if draw_order(static) > draw_order(dynamic)]
+                index = area.collidelistall(above)
+                if index:
+                    bound = Rect(above[index[0]]).unionall(
+                        [above[i] for i in index[1:]])
+                    areas.append(area.clip(bound))
+            if areas:
+                self._recompose(surface, background, areas,
+                                covering + covered)
+
+    def _recompose(self, surface, background, areas, sprites):
+        """Redraw the given areas in layer order."""
+        clip = surface.get_clip()
+        sprites = sorted(sprites, key=draw_order)
+        sprite_rects = [sprite.rect for sprite in sprites]
+        for area in areas:
+            surface.set_clip(area)
+            if background is None:
+                surface.fill((0, 0, 0))
+            else:
+                surface.blit(background, area, area)
+            for index in area.collidelistall(sprite_rects):
+                sprite = sprites[index]
+                surface.blit(sprite.image, sprite.rect, sprite.source_rect)
+        surface.set_clip(clip)
+
+
+class BatchedGroup(BufferedLayers, LayeredDirty):
+    """Dirty sprite group submitting all the blits of a frame at once.
+
+    It draws exactly like LayeredDirty, but the blits are gathered in layer
+    order into a single sequence, reused between frames, and passed to
+    Surface.blits. This saves the Python overhead of one call per blit,
+    which matters for views with many small sprites.
+    """
+
+    def __init__(self, *sprites, **kwargs):
+        self._blit_lst = []
+        self._owner_lst = []
+        super(BatchedGroup, self).__init__(*sprites, **kwargs)
+
+    def draw(self, surface, bgd=None):
+        """Draw the sprites and return the list of updated rects."""
+        self.apply_layers()
+        orig_clip = surface.get_clip()
+        clip = orig_clip if self._clip is None else self._clip
+        if bgd is not None:
+            self._bgd = bgd
+        bgd = self._bgd
+        sprites = self._spritelist
+        old_rects = self.spritedict
+        update = self.lostsprites
+        blits = self._blit_lst
+        owners = self._owner_lst
+        surface.set_clip(clip)
+        start_time = get_ticks()
+        # Dirty rects mode
+        if self._use_update:
+            for sprite in sprites:
+                if sprite.dirty > 0:
+                    if sprite.source_rect:
+                        rect = Rect(sprite.rect.topleft,
+                                    sprite.source_rect.size)
+                    else:
+                        rect = Rect(sprite.rect)
+                    self._add_update(update, rect, clip)
+                    if old_rects[sprite] is not self._init_rect:
+                        self._add_update(update, Rect(old_rects[sprite]), clip)
+            if bgd is not None:
+                for rect in update:
+                    blits.append((bgd, rect, rect))
+            for sprite in sprites:
+                if sprite.dirty < 1:
+                    if not sprite._visible:
+                        continue
+                    if sprite.source_rect is not None:
+                        rect = Rect(sprite.rect.topleft,
+                                    sprite.source_rect.size)
+                        dx = sprite.source_rect[0] - rect[0]
+                        dy = sprite.source_rect[1] - rect[1]
+                    else:
+                        rect = sprite.rect
+                        dx, dy = -rect[0], -rect[1]
+                    for index in rect.collidelistall(update):
+                        area = rect.clip(update[index])
+                        blits.append((sprite.image, area,
+                                      (area[0] + dx, area[1] + dy,
+                                       area[2], area[3]),
+                                      sprite.blendmode))
+                else:
+                    if sprite._visible:
+                        owners.append((len(blits), sprite))
+                        blits.append((sprite.image, sprite.rect,
+                                      sprite.source_rect, sprite.blendmode))
+                    if sprite.dirty == 1:
+                        sprite.dirty = 0
+            result = list(update)
+        # Full screen mode
+        else:
+            if bgd is not None:
+                blits.append((bgd, (0, 0)))
+            for sprite in sprites:
+                if sprite._visible:
+                    owners.append((len(blits), sprite))
+                    blits.append((sprite.image, sprite.rect,
+                                  sprite.source_rect, sprite.blendmode))
+            result = [Rect(clip)]
+        # Submit the blits
+        if blits:
+            rects = surface.blits(blits)
+            for index, sprite in owners:
+                old_rects[sprite] = rects[index]
+            del blits[:], owners[:]
+        # Switch modes
+        self._use_update = get_ticks() - start_time <= self._time_threshold
+        update[:] = []
+        surface.set_clip(orig_clip)
+        return result
+
+    @staticmethod
+    def _add_update(update, rect, clip):
+        index = rect.collidelist(update)
+        while index > -1:
+            rect.union_ip(update[index])
+            del update[index]
+            index = rect.collidelist(update)
+        update.append(rect.clip(clip))
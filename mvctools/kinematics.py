@@ -0,0 +1,207 @@
+"""Module for the bulk integration of many moving entities."""
+
+from mvctools.model import BaseModel
+from mvctools.common import xytuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Behaviors at the bounds
+FREE = 0
+CLAMP = 1
+BOUNCE = 2
+
+
+class Body(object):
+    """Handle on the row of an entity in a kinematics system.
+
+    It is cheap to keep in a model or a sprite: the position and the
+    velocity are only read from the system when accessed, as xytuples.
+    """
+
+    __slots__ = ("system", "index")
+
+    def __init__(self, system, index):
+        self.system = system
+        self.index = index
+
+    @property
+    def alive(self):
+        return self.index is not None
+
+    @property
+    def pos(self):
+        return self.system.get(self.index, self.system.positions)
+
+    @pos.setter
+    def pos(self, value):
+        self.system.set(self.index, self.system.positions, value)
+
+    @property
+    def velocity(self):
+        return self.system.get(self.index, self.system.velocities)
+
+    @velocity.setter
+    def velocity(self, value):
+        self.system.set(self.index, self.system.velocities, value)
+
+    def remove(self):
+        """Remove the entity from its system."""
+        self.system.remove(self)
+
+
+class KinematicsSystem(BaseModel):
+    """Model integrating the positions of many entities in a single step.
+
+    The positions, velocities and bounds of the entities are stored in
+    arrays, one row per entity. At each tick, the positions are moved
+    according to the velocities (in units per second) and the current
+    fps, and the entities out of their bounds are clamped or bounced,
+    all at once. NumPy arrays are used if NumPy is available. Otherwise,
+    the same computation runs on lists.
+
+    Entities are added with **add**, which returns a Body. The rows are
+    kept contiguous: removing an entity moves the last row to its place.
+
+    Args:
+        parent (BaseModel): the parent of the system
+        capacity (int): initial number of rows (default is 64)
+    """
+
+    def init(self, capacity=64):
+        self.count = 0
+        self.bodies = []
+        if numpy is None:
+            self.positions, self.velocities = [], []
+            self.lows, self.highs, self.modes = [], [], []
+        else:
+            self._allocate(max(1, capacity))
+
+    def _allocate(self, capacity):
+        arrays = []
+        for default in (0., 0., -numpy.inf, numpy.inf):
+            array = numpy.full((capacity, 2), default)
+            if self.count:
+                array[:self.count] = self._arrays[len(arrays)][:self.count]
+            arrays.append(array)
+        modes = numpy.zeros(capacity, dtype=numpy.int8)
+        if self.count:
+            modes[:self.count] = self.modes[:self.count]
+        self._arrays = arrays
+        self.positions, self.velocities, self.lows, self.highs = arrays
+        self.modes = modes
+
+    # Entities
+
+    def add(self, pos, velocity=(0, 0), bounds=None, mode=FREE):
+        """Add an entity and return its body.
+
+        Args:
+            pos (tuple): initial position
+            velocity (tuple): velocity, in units per second
+                (default is (0, 0))
+            bounds (tuple or None): (low, high) corners of the area the
+                entity stays in (default is None for no bounds)
+            mode (int): FREE, CLAMP or BOUNCE (default is FREE)
+        """
+        low, high = bounds if bounds else ((-float("inf"),) * 2,
+                                           (float("inf"),) * 2)
+        index = self.count
+        row = [tuple(map(float, value))
+               for value in (pos, velocity, low, high)]
+        if numpy is None:
+            for values, value in zip((self.positions, self.velocities,
+                                      self.lows, self.highs), row):
+                values.append(list(value))
+            self.modes.append(mode)
+        else:
+            if index == len(self.modes):
+                self._allocate(2 * index)
+            for array, value in zip(self._arrays, row):
+                array[index] = value
+            self.modes[index] = mode
+        body = Body(self, index)
+        self.bodies.append(body)
+        self.count += 1
+        return body
+
+    def remove(self, body):
+        """Remove the entity of a body, and move the last row to its place."""
+        index, last = body.index, self.count - 1
+        if index is None:
+            return
+        moved = self.bodies.pop()
+        if numpy is None:
+            for values in (self.positions, self.velocities, self.lows,
+                           self.highs, self.modes):
+                values[index] = values[last]
+                values.pop()
+        else:
+            for array in self._arrays + [self.modes]:
+                array[index] = array[last]
+        if moved is not body:
+            moved.index = index
+            self.bodies[index] = moved
+        body.index = None
+        self.count = last
+
+    def get(self, index, values):
+        x, y = values[index]
+        return xytuple(float(x), float(y))
+
+    def set(self, index, values, value):
+        x, y = value
+        values[index][0] = x
+        values[index][1] = y
+
+    # Integration
+
+    def update(self):
+        if not self.count:
+            return
+        delta = 1.0/self.state.current_fps
+        if numpy is None:
+            self._integrate_lists(delta)
+        else:
+            self._integrate_arrays(delta)
+
+    def _integrate_arrays(self, delta):
+        count = self.count
+        pos = self.positions[:count]
+        vel = self.velocities[:count]
+        low = self.lows[:count]
+        high = self.highs[:count]
+        pos += vel * delta
+        below = pos < low
+        above = pos > high
+        out = below | above
+        if not out.any():
+            return
+        bounce = (self.modes[:count] == BOUNCE)[:, None] & out
+        if bounce.any():
+            numpy.copyto(pos, 2*low - pos, where=bounce & below)
+            numpy.copyto(pos, 2*high - pos, where=bounce & above)
+            vel[bounce] *= -1
+        clip = (self.modes[:count] != FREE)[:, None] & out
+        numpy.copyto(pos, numpy.clip(pos, low, high), where=clip)
+
+    def _integrate_lists(self, delta):
+        for index in range(self.count):
+            pos = self.positions[index]
+            vel = self.velocities[index]
+            low = self.lows[index]
+            high = self.highs[index]
+            mode = self.modes[index]
+            for axis in (0, 1):
+                value = pos[axis] + vel[axis] * delta
+                if mode != FREE and not low[axis] <= value <= high[axis]:
+                    if mode == BOUNCE:
+                        bound = low[axis] if value < low[axis] \
+                                else high[axis]
+                        value = 2*bound - value
+                        vel[axis] = -vel[axis]
+                    value = min(max(value, low[axis]), high[axis])
+                pos[axis] = value
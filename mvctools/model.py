@@ -4,6 +4,30 @@
 from itertools import count, chain
 
 
+# State context class
+class StateContext(object):
+    """Attributes shared by the models and sprites of a state.
+
+    Args:
+        state (BaseState): the state
+    """
+
+    __slots__ = ("state", "control", "gamedata", "resource", "settings",
+                 "keygen")
+
+    def __init__(self, state):
+        self.state = state
+        self.control = state.control
+        self.gamedata = self.control.gamedata
+        self.resource = self.control.resource
+        self.settings = self.control.settings
+        self.keygen = count()
+
+
+# Marker for the context attributes not assigned on a model
+_unset = object()
+
+
 # Base model class
 class BaseModel(object):
     """Model base class.
@@ -32,12 +56,23 @@ class BaseModel(object):
      - **self.state**: the state that uses the controller
      - **self.control**: the game that uses the controller
      - **self.gamedata**: the game data of the control
+     - **self.context**: the context of the state (see StateContext)
      - **self.key**: a unique identifier for the model
      - **self.parent**: the parent of the model
      - **self.children**: the children dictionary
      - **self.isroot**: True if it is the main model
+
+    The state, control and gamedata attributes are read from the context,
+    shared by all the models of a state, unless they are assigned on the
+    model itself. The base classes use slots, so
+    a subclass defining its own **__slots__** has no instance dictionary.
+    The other subclasses get one as usual.
     """
 
+    __slots__ = ("context", "isroot", "key", "parent", "children",
+                 "lifetime", "_state", "_control", "_gamedata",
+                 "__weakref__")
+
     def __init__(self, parent, *args, **kargs):
         """Initialize the model with its parent and register itself.
 
@@ -46,15 +81,16 @@ class BaseModel(object):
             args (list): custom arguments
             kwargs (dict): custom keyword arguments
         """
+        self._state = self._control = self._gamedata = _unset
         self.isroot = not isinstance(parent, BaseModel)
-        # Attributes to higher instances
-        self.state = parent if self.isroot else parent.state
-        self.control = parent.control
-        self.gamedata = self.control.gamedata
-        # Semi private attribute
-        self._keygen = count() if self.isroot else parent._keygen
+        # Context shared with higher instances
+        if not self.isroot:
+            self.context = parent.context
+        else:
+            self.context = getattr(parent, "context", None) or \
+                           StateContext(parent)
         # Useful attributes
-        self.key = next(self._keygen)
+        self.key = next(self.context.keygen)
         # Children and parent handling
         self.parent = parent
         self.children = {}
@@ -63,6 +99,33 @@ class BaseModel(object):
         # Call user initialisation
         self.init(*args, **kargs)
 
+    @property
+    def state(self):
+        value = self._state
+        return self.context.state if value is _unset else value
+
+    @state.setter
+    def state(self, value):
+        self._state = value
+
+    @property
+    def control(self):
+        value = self._control
+        return self.context.control if value is _unset else value
+
+    @control.setter
+    def control(self, value):
+        self._control = value
+
+    @property
+    def gamedata(self):
+        value = self._gamedata
+        return self.context.gamedata if value is _unset else value
+
+    @gamedata.setter
+    def gamedata(self, value):
+        self._gamedata = value
+
     def init(self, *args, **kwargs):
         """Method to override.
 
@@ -195,6 +258,9 @@ class Timer(BaseModel):
     This way, the timer ignore lags or frame rate variations.
     """
 
+    __slots__ = ("_start", "_stop", "_periodic", "_callback", "_ratio",
+                 "_current_value", "_next_increment")
+
     def init(self, start=0, stop=None, periodic=False, callback=None):
         """Initalize the timer.
 
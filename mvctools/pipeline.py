@@ -0,0 +1,175 @@
+"""Module for the pipelined rendering of the views."""
+
+import sys
+from threading import Thread
+from pygame import Rect
+from mvctools.common import reraise
+from mvctools.group import draw_order
+
+try:
+    from Queue import Queue
+except ImportError:
+    from queue import Queue
+
+
+class FrameSnapshot(object):
+    """Immutable description of a frame, taken from the sprites of a view.
+
+    The entries are tuples (sprite, image, rect, area, order, dirty,
+    blendmode), sorted in the drawing order of the groups. The sprite is
+    only used as a key: the render thread never reads its attributes.
+    Hence, the sprites have to replace their images instead of drawing on
+    them, which is already the case for the automatic sprites.
+    """
+
+    __slots__ = ("background", "entries")
+
+    def __init__(self, view):
+        self.background = view.background
+        entries = []
+        for group in (view.static_group, view.group):
+            for sprite in group.sprites():
+                dirty = sprite.dirty
+                if sprite.dirty == 1:
+                    sprite.dirty = 0
+                if not sprite.visible:
+                    continue
+                area = sprite.source_rect
+                area = Rect(area) if area else None
+                entry = (sprite, sprite.image, Rect(sprite.rect), area,
+                         draw_order(sprite), dirty, sprite.blendmode)
+                entries.append(entry)
+        entries.sort(key=lambda entry: entry[4])
+        self.entries = tuple(entries)
+
+
+class RenderPipeline(object):
+    """Draw the frame snapshots of a view in a dedicated thread.
+
+    The render thread draws frame N while the state computes frame N+1.
+    The queue holds a single snapshot, so the state never runs more than
+    one frame ahead of the display. Blits release the GIL, so both threads
+    actually run in parallel. The display itself is only updated from the
+    main thread, as SDL requires: a drawn frame is presented by the next
+    call to submit or close, before another snapshot is drawn.
+
+    An exception raised in the render thread is raised again, with its
+    traceback, by the next call to submit or close.
+    """
+
+    def __init__(self, view):
+        self.view = view
+        self.queue = Queue(maxsize=1)
+        self.done = Queue(maxsize=1)
+        self.pending = False
+        self.rect_dct = {}
+        self.background = None
+        self.first_frame = True
+        self.error = None
+        self.merger = view.dirty_manager_class(view.screen.get_rect())
+        self.thread = Thread(target=self._run, name="render")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def submit(self, snapshot):
+        """Present the previous frame, then queue a snapshot."""
+        self._present()
+        self.queue.put(snapshot)
+        self.pending = True
+
+    def close(self):
+        """Present the queued snapshot and stop the render thread."""
+        if self.thread.is_alive():
+            self._present()
+            self.queue.put(None)
+            self.thread.join()
+        self._check()
+
+    def _present(self):
+        # Wait for the frame being drawn and update the display
+        if self.pending:
+            self.pending = False
+            rects = self.done.get()
+            self._check()
+            self.view.dirty_manager.update(rects)
+
+    def _check(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            reraise(*error)
+
+    def _run(self):
+        while True:
+            snapshot = self.queue.get()
+            if snapshot is None:
+                return
+            rects = []
+            if self.error is None:
+                try:
+                    rects = self.render(snapshot)
+                except Exception:
+                    self.error = sys.exc_info()
+            self.done.put(rects)
+
+    def render(self, snapshot):
+        """Draw a snapshot, from the render thread.
+
+        Args:
+            snapshot (FrameSnapshot): the frame to draw
+        Return:
+            list: the areas of the display to update
+        """
+        view = self.view
+        screen = view.screen
+        background = snapshot.background
+        rects = self.get_dirty_rects(snapshot)
+        rects = self.merger.merge(rects)
+        # Redraw each area in drawing order
+        entries = snapshot.entries
+        entry_rects = [entry[2] for entry in entries]
+        for rect in rects:
+            if background is not None:
+                screen.blit(background, rect, rect)
+            for index in sorted(rect.collidelistall(entry_rects)):
+                entry = entries[index]
+                sprite, image, sprite_rect, area = entry[:4]
+                blendmode = entry[6]
+                clip = sprite_rect.clip(rect)
+                source = clip.move(-sprite_rect.x, -sprite_rect.y)
+                if area:
+                    source.move_ip(area.topleft)
+                screen.blit(image, clip, source, blendmode)
+        # Scale to the display surface, updated by the main thread
+        if screen is not view.display:
+            rects = view.present(rects)
+        return rects
+
+    def get_dirty_rects(self, snapshot):
+        """Compare a snapshot with the previous one.
+
+        Args:
+            snapshot (FrameSnapshot): the frame to draw
+        Return:
+            list: the areas to redraw
+        """
+        previous, self.rect_dct = self.rect_dct, {}
+        for entry in snapshot.entries:
+            sprite, image, rect, area, order, dirty, blendmode = entry
+            self.rect_dct[sprite] = rect, image, area, order, blendmode
+        # Full redraw
+        if self.first_frame or snapshot.background is not self.background:
+            self.first_frame = False
+            self.background = snapshot.background
+            return [self.view.screen.get_rect()]
+        # Partial redraw
+        rects = []
+        for entry in snapshot.entries:
+            sprite, image, rect, area, order, dirty, blendmode = entry
+            old = previous.pop(sprite, None)
+            if old is None:
+                rects.append(rect)
+            elif dirty or old != (rect, image, area, order, blendmode):
+                rects.append(old[0])
+                rects.append(rect)
+        rects.extend(old[0] for old in previous.values())
+        return rects
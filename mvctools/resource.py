@@ -1,8 +1,21 @@
 import os, sys
+import codecs
 import pygame 
 from itertools import chain, ifilter
 from collections import defaultdict
 import threading
+import weakref
+import struct
+import json
+import mmap
+from timeit import default_timer
+from mvctools.tilemap import get_map
+from mvctools.cache import Cache, surface_size
+
+try:
+    _buffer = buffer
+except NameError:
+    _buffer = lambda obj, offset, size: memoryview(obj)[offset:offset+size]
 
 # Loaders
 
@@ -15,16 +28,412 @@ def walk(path):
     return os.walk(resource_path(path))
 
 
+# Conversion
+
+OPAQUE = "opaque"
+COLORKEY = "colorkey"
+ALPHA = "alpha"
+COLORKEY_VALUE = (255, 0, 255)
+COLORKEY_CANDIDATES = (COLORKEY_VALUE, (0, 255, 255), (255, 255, 0),
+                       (1, 2, 3), (254, 1, 253))
+IMAGE_EXTENSIONS = ("png", "jpg", "bmp")
+SMOOTH = "smooth"
+FAST = "fast"
+
+def analyze_alpha(image):
+    """ Return the conversion mode matching the alpha channel of an image:
+     - OPAQUE if every pixel is opaque
+     - COLORKEY if every pixel is either opaque or fully transparent
+     - ALPHA otherwise
+    """
+    if image.get_colorkey() is not None:
+        return COLORKEY
+    if not image.get_flags() & pygame.SRCALPHA:
+        return OPAQUE
+    opaque = pygame.mask.from_surface(image, 254).count()
+    if opaque == image.get_width() * image.get_height():
+        return OPAQUE
+    visible = pygame.mask.from_surface(image, 0).count()
+    if visible == opaque:
+        return COLORKEY
+    return ALPHA
+
+def find_colorkey(image):
+    """ Return a key color used by none of the opaque pixels of an image,
+    or None if all the candidates are used """
+    opaque = pygame.mask.from_surface(image, 0)
+    for color in COLORKEY_CANDIDATES:
+        used = pygame.mask.from_threshold(image, color, (1, 1, 1, 255))
+        if not used.overlap_area(opaque, (0, 0)):
+            return color
+    return None
+
+def transparent_color(image):
+    """ Return the color shared by the transparent pixels of an image,
+    or None if they don't share one """
+    if image.get_colorkey() is not None:
+        return tuple(image.get_colorkey())[:3]
+    transparent = pygame.mask.from_surface(image, 0)
+    transparent.invert()
+    count = transparent.count()
+    if not count:
+        return None
+    rect = transparent.get_bounding_rects()[0]
+    x = next(x for x in range(rect.left, rect.right)
+             if transparent.get_at((x, rect.top)))
+    color = tuple(image.get_at((x, rect.top)))[:3]
+    same = pygame.mask.from_threshold(image, color, (1, 1, 1, 255))
+    if same.overlap_area(transparent, (0, 0)) == count:
+        return color
+    return None
+
+# Transparent color of the colorkey images, to scale them smoothly.
+# The per-pixel alpha version is only kept when that color is not uniform.
+alpha_sources = weakref.WeakKeyDictionary()
+
+def convert_image(image, mode):
+    """ Convert an image to the display format according to its mode """
+    if mode == OPAQUE:
+        return image.convert()
+    key = find_colorkey(image) if mode == COLORKEY else None
+    if key is None:
+        return image.convert_alpha()
+    converted = colorkey_image(image, key)
+    color = transparent_color(image)
+    alpha_sources[converted] = color or image.convert_alpha()
+    return converted
+
+def colorkey_image(image, key):
+    """ Convert an image with a binary alpha channel to a colorkey image """
+    converted = image.convert()
+    converted.fill(key)
+    converted.blit(image, (0, 0))
+    converted.set_colorkey(key, pygame.RLEACCEL)
+    return converted
+
+def get_alpha_source(image):
+    """ Get the per-pixel alpha version of a colorkey image """
+    source = alpha_sources.get(image)
+    if source is not None and not isinstance(source, tuple):
+        return source
+    alpha = image.convert_alpha()
+    if source is None:
+        return alpha
+    # Restore the color of the transparent pixels
+    result = pygame.Surface(alpha.get_size(), pygame.SRCALPHA, alpha)
+    result.fill(source + (255,))
+    result.blit(alpha, (0, 0))
+    result.fill((0, 0, 0, 255), special_flags=pygame.BLEND_RGBA_SUB)
+    alpha.fill((255, 255, 255, 0), special_flags=pygame.BLEND_RGBA_SUB)
+    result.blit(alpha, (0, 0), special_flags=pygame.BLEND_RGBA_ADD)
+    return result
+
+def threshold_alpha(image):
+    """ Copy a per-pixel alpha image, with its alpha set to 0 below 127
+    and to 255 above """
+    mask = image.copy()
+    mask.fill((0, 0, 0, 128), special_flags=pygame.BLEND_RGBA_ADD)
+    mask.fill((255, 255, 255, 254), special_flags=pygame.BLEND_RGBA_SUB)
+    for _ in range(8):
+        mask.blit(mask, (0, 0), special_flags=pygame.BLEND_RGBA_ADD)
+    result = image.copy()
+    result.fill((0, 0, 0, 255), special_flags=pygame.BLEND_RGBA_SUB)
+    result.blit(mask, (0, 0), special_flags=pygame.BLEND_RGBA_ADD)
+    return result
+
+def scale_colorkey(image, size):
+    """ Scale a colorkey image smoothly, keeping it a colorkey image """
+    scaled = pygame.transform.smoothscale(get_alpha_source(image), size)
+    scaled = threshold_alpha(scaled)
+    key = find_colorkey(scaled)
+    if key is None:
+        return scaled
+    converted = colorkey_image(scaled, key)
+    source = alpha_sources.get(image)
+    if isinstance(source, tuple):
+        alpha_sources[converted] = source
+    elif source is not None:
+        alpha_sources[converted] = scaled
+    return converted
+
+def scale_image(image, size, quality=SMOOTH):
+    """ Scale an image, smoothly if the quality and its format allow it """
+    if quality == SMOOTH and image.get_colorkey() is not None:
+        return scale_colorkey(image, size)
+    if quality == SMOOTH and image.get_bitsize() in (24, 32):
+        return pygame.transform.smoothscale(image, size)
+    return pygame.transform.scale(image, size)
+
+
+# Mipmap
+
+class Mipmap(object):
+    """ Pyramid of half-size levels of an image, built lazily.
+
+    Scaling starts from the smallest level larger than the target size.
+    Only the derived levels are stored: the image itself is passed to
+    each call, so a mipmap cached with its image doesn't keep it alive.
+    """
+
+    def __init__(self):
+        self.levels = []
+
+    def level(self, image, size):
+        """ Get the smallest level larger than the given size """
+        width, height = size
+        last = self.levels[-1] if self.levels else image
+        while last.get_width() >= 2*width and last.get_height() >= 2*height \
+          and min(last.get_size()) > 1:
+            half = last.get_width()//2, last.get_height()//2
+            last = scale_image(last, half)
+            self.levels.append(last)
+        for level in reversed(self.levels):
+            if level.get_width() >= width and level.get_height() >= height:
+                return level
+        return image
+
+    def scale(self, image, size, quality=SMOOTH):
+        """ Scale the image to the given size """
+        size = tuple(size)
+        source = self.level(image, size)
+        if source.get_size() == size:
+            return source
+        return scale_image(source, size, quality)
+
+
+mipmap_cache = Cache(lambda image: Mipmap(), weak=True, name="mipmap")
+
+def get_mipmap(image):
+    """ Get the mipmap of an image, cached with the image """
+    return mipmap_cache[image]
+
+def rescale(image, size, quality=SMOOTH):
+    """ Scale an image from its mipmap """
+    return get_mipmap(image).scale(image, size, quality)
+
+
+# Pack
+
+PACK_MAGIC = b"MVCPACK1"
+PACK_HEADER = struct.Struct("<8sQ")
+
+def pack_key(path):
+    """ Format a path as a pack index key """
+    return "/".join(part for part in os.path.normpath(path).split(os.sep)
+                    if part not in ("", "."))
+
+def build_pack(directory, filename, analyze=False):
+    """ Build a single indexed pack file from a resource directory.
+
+    The pack keeps the name of the directory as a root, so a pack built
+    from "resource" can replace the "resource" directory as it is.
+    If analyze is True, the conversion mode of each image is computed
+    and stored in the pack.
+    """
+    root = os.path.dirname(os.path.normpath(directory))
+    entries = []
+    for path, subdirs, files in os.walk(directory):
+        subdirs.sort()
+        for name in sorted(files):
+            if not name.startswith("."):
+                fullpath = os.path.join(path, name)
+                entries.append((pack_key(os.path.relpath(fullpath, root)),
+                                fullpath))
+    # Compute offsets
+    index = {"dirs": [pack_key(os.path.relpath(path, root))
+                      for path, _, _ in os.walk(directory)],
+             "files": {},
+             "conversions": {}}
+    if analyze:
+        for key, fullpath in entries:
+            if fullpath.lower().endswith(IMAGE_EXTENSIONS):
+                mode = analyze_alpha(pygame.image.load(fullpath))
+                index["conversions"][key.partition("/")[2]] = mode
+    sizes = [os.path.getsize(fullpath) for _, fullpath in entries]
+    offset = 0
+    for (key, _), size in zip(entries, sizes):
+        index["files"][key] = [offset, size]
+        offset += size
+    raw_index = json.dumps(index, sort_keys=True).encode("utf-8")
+    # Write pack
+    with open(filename, "wb") as pack:
+        pack.write(PACK_HEADER.pack(PACK_MAGIC, len(raw_index)))
+        pack.write(raw_index)
+        for _, fullpath in entries:
+            with open(fullpath, "rb") as source:
+                pack.write(source.read())
+    return filename
+
+
+class PackFile(object):
+    """ Read-only file-like object over a slice of a memory-mapped pack
+
+    read returns bytes, as the pygame loaders require. Use readbuffer for
+    a zero-copy slice of the pack instead.
+    """
+
+    def __init__(self, data, name=""):
+        self._data = data
+        self._size = len(data)
+        self._pos = 0
+        self.name = name
+
+    def readbuffer(self, size=-1):
+        """ Read a zero-copy buffer or memoryview slice of the pack """
+        start = self._pos
+        if size is None or size < 0:
+            stop = self._size
+        else:
+            stop = min(self._size, start + size)
+        self._pos = stop
+        return _buffer(self._data, start, stop - start)
+
+    def read(self, size=-1):
+        return bytes(self.readbuffer(size))
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += self._size
+        self._pos = max(0, min(self._size, offset))
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        pass
+
+
+class ResourcePack(object):
+    """ Memory-mapped resource pack built with build_pack """
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, "rb") as pack:
+            self._mmap = mmap.mmap(pack.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, length = PACK_HEADER.unpack_from(self._mmap)
+        if magic != PACK_MAGIC:
+            raise IOError("'{}' is not a resource pack".format(filename))
+        start = PACK_HEADER.size
+        index = json.loads(self._mmap[start:start+length].decode("utf-8"))
+        self._data_offset = start + length
+        self._files = index["files"]
+        self.conversions = index.get("conversions", {})
+        # Directory listings
+        self._listing = {key: ([], []) for key in index["dirs"]}
+        for key in index["dirs"]:
+            parent, name = key.rpartition("/")[::2]
+            if parent in self._listing:
+                self._listing[parent][0].append(name)
+        for key in self._files:
+            parent, name = key.rpartition("/")[::2]
+            self._listing[parent][1].append(name)
+
+    def walk(self, path):
+        """ Mimic os.walk for the directory at the given path """
+        key = pack_key(path)
+        if key not in self._listing:
+            return
+        subdirs, files = self._listing[key]
+        yield path, sorted(subdirs), sorted(files)
+
+    def getsize(self, path):
+        return self._files[pack_key(path)][1]
+
+    def open(self, path):
+        """ Return a zero-copy file-like object for the given file """
+        offset, size = self._files[pack_key(path)]
+        data = _buffer(self._mmap, self._data_offset + offset, size)
+        return PackFile(data, path)
+
+    def __contains__(self, path):
+        return pack_key(path) in self._files
+
+
+# Manifest
+
+def state_key(state):
+    """ Key of a state class in a manifest """
+    return ".".join((state.__module__, state.__name__))
+
+
+class ResourceManifest(object):
+    """ Ordered (path, formatting) entries requested by each state """
+
+    def __init__(self, entries=None, conversions=None):
+        self._entries = dict(entries or {})
+        self.conversions = dict(conversions or {})
+
+    @classmethod
+    def read(cls, filename):
+        with open(filename) as manifest:
+            data = json.load(manifest)
+        format_ = lambda x: tuple(x) if isinstance(x, list) else x
+        return cls({key: [(path, format_(formatting))
+                          for path, formatting in entries]
+                    for key, entries in data["states"].items()},
+                   data.get("conversions"))
+
+    def write(self, filename):
+        states = {key: [[path, formatting] for path, formatting in entries]
+                  for key, entries in self._entries.items()}
+        data = {"states": states, "conversions": self.conversions}
+        with open(filename, "w") as manifest:
+            json.dump(data, manifest, indent=1, sort_keys=True)
+
+    def get(self, state, default=None):
+        return self._entries.get(state_key(state), default)
+
+    def update(self, other):
+        self._entries.update(other._entries)
+        self.conversions.update(other.conversions)
+
+    def __contains__(self, state):
+        return state_key(state) in self._entries
+
+
+class ResourceTracer(object):
+    """ Record the resources requested by each state, in order """
+
+    def __init__(self):
+        self.state = None
+        self._entries = defaultdict(list)
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def record(self, path, formatting):
+        if self.state is None:
+            return
+        key = state_key(self.state)
+        with self._lock:
+            if (key, path, formatting) not in self._seen:
+                self._seen.add((key, path, formatting))
+                self._entries[key].append((path, formatting))
+
+    def get_manifest(self):
+        return ResourceManifest(self._entries)
+
+
 # Handler
 
 class ResourceHandler:
     
-    def __init__(self, directory):
-        self._dir, self._subdirs, self._files = next(walk(directory))
+    def __init__(self, directory, pack=None, path=(), conversions=None):
+        self._pack = pack
+        self._path = path
+        self._tracer = None
+        self.scale_quality = SMOOTH
+        self._conversion_dict = {} if conversions is None else conversions
+        walker = pack.walk if pack else walk
+        self._dir, self._subdirs, self._files = next(walker(directory))
         self._files = [os.path.splitext(f)
                            for f in self._files
                                if not f.startswith(".")]
-        self._subdir_dict = {subdir: ResourceHandler(self._join(subdir))
+        self._subdir_dict = {subdir: ResourceHandler(self._join(subdir), pack,
+                                                     path + (subdir,),
+                                                     self._conversion_dict)
                              for subdir in self._subdirs}
         self._resource_dict = defaultdict(dict)
         self._subdirs.sort()
@@ -38,8 +447,16 @@ class ResourceHandler:
     def getfilenames(self, filtered=True):
         return sorted(r+e for r,e in self._files)
 
+    def iterload(self, entries=None, recursive=True):
+        """ Return an iterator loading a file per step, from the (path,
+        formatting) entries of a manifest or the whole tree """
+        if entries is None:
+            return self._loaditerator(recursive)
+        return (self._getpath(path, formatting)
+                for path, formatting in entries)
+
     def load(self, recursive=True, threaded=False, callback=None):
-        iterator = self.reciterator() if recursive else iter(self)
+        iterator = self.iterload(recursive=recursive)
         # Not threaded case
         if not threaded:
             list(iterator)
@@ -49,7 +466,36 @@ class ResourceHandler:
             callback = lambda:None
         func = lambda : (list(iterator), callback())
         threading.Thread(target=func).start()
-    
+
+    def preload(self, entries, threaded=False, callback=None):
+        """ Load the (path, formatting) entries of a manifest in order """
+        iterator = self.iterload(entries)
+        # Not threaded case
+        if not threaded:
+            list(iterator)
+            return
+        # Threaded
+        if not callable(callback):
+            callback = lambda:None
+        func = lambda : (list(iterator), callback())
+        threading.Thread(target=func).start()
+
+    def set_quality(self, quality):
+        """ Set the scaling quality (SMOOTH or FAST) and unload the
+        images scaled so far """
+        self.scale_quality = quality
+        for scaled in self._resource_dict.values():
+            for formatting in list(scaled):
+                if isinstance(formatting, tuple):
+                    del scaled[formatting]
+        for sub in self._subdir_dict.values():
+            sub.set_quality(quality)
+
+    def trace(self, tracer):
+        """ Record the requested files with the given tracer (or None) """
+        self._tracer = tracer
+        for sub in self._subdir_dict.values():
+            sub.trace(tracer)
         
     def unload(self, recursive=True, threaded=False, callback=None):
         unloaders = [self._resource_dict.clear]
@@ -84,6 +530,12 @@ class ResourceHandler:
             return default
 
     def getfile(self, name, formatting=None, default=None):
+        resource = self._getfile(name, formatting, default)
+        if self._tracer and resource is not default:
+            self._tracer.record(self._key(name), formatting)
+        return resource
+
+    def _getfile(self, name, formatting=None, default=None):
         root, ext = os.path.splitext(name)
         # Look for an already loaded resource
         if formatting in self._resource_dict[root]:
@@ -109,6 +561,61 @@ class ResourceHandler:
         # Return default
         return default
 
+    def getconversions(self):
+        """ Get the conversion modes of the images analyzed so far """
+        return dict(self._conversion_dict)
+
+    def conversion_report(self, repeat=10, ratio=0.75):
+        """ Measure the blit cost of each image of the tree, with
+        convert_alpha and with its conversion mode, at its native size
+        and scaled by the given ratio with the current quality.
+
+        Return a list of (path, mode, alpha_time, converted_time,
+        scaled_alpha_time, scaled_converted_time, extra_bytes) tuples,
+        with times in seconds for the given number of blits. extra_bytes
+        is the size of the per-pixel alpha version kept for scaling.
+        """
+        target = pygame.display.get_surface().copy()
+        report = []
+        for handler in chain([self], self._iterhandlers()):
+            for root, ext in handler._files:
+                if handler._format_ext(ext) not in IMAGE_EXTENSIONS:
+                    continue
+                name = root + ext
+                converted = handler._getfile(name)
+                raw = pygame.image.load(handler._open(name), name)
+                alpha = raw.convert_alpha()
+                size = [max(1, int(x * ratio)) for x in raw.get_size()]
+                images = (alpha, converted,
+                          scale_image(alpha, size, self.scale_quality),
+                          scale_image(converted, size, self.scale_quality))
+                times = []
+                for image in images:
+                    start = default_timer()
+                    for _ in range(repeat):
+                        target.blit(image, (0, 0))
+                    times.append(default_timer() - start)
+                source = alpha_sources.get(converted)
+                extra = 0
+                if source is not None and not isinstance(source, tuple):
+                    extra = surface_size(source)
+                mode = handler._conversion_dict[handler._key(name)]
+                report.append((handler._key(name), mode) + tuple(times)
+                              + (extra,))
+        return report
+
+    def getmap(self, name, default=None):
+        """ Get a file as a compiled tile map """
+        filename = self._find(name)
+        if filename is None:
+            return default
+        if self._pack:
+            mtime = os.path.getmtime(self._pack.filename)
+        else:
+            mtime = os.path.getmtime(self._resource_path(filename))
+        load = lambda: self.load_file(filename)
+        return get_map(self._join(filename), mtime, load)
+
     def getdir(self, name, default=None):
         if name in self._subdir_dict:
             return self._subdir_dict[name]
@@ -143,6 +650,51 @@ class ResourceHandler:
 
     # Private methods
 
+    def _key(self, name):
+        """ Path of a file relative to the root handler """
+        return "/".join(self._path + (name,))
+
+    def _iterhandlers(self):
+        """ Iter recursively over the sub handlers """
+        for sub in self._subdir_dict.values():
+            yield sub
+            for handler in sub._iterhandlers():
+                yield handler
+
+    def _convert(self, name, image):
+        """ Convert an image according to its cached conversion mode """
+        key = self._key(name)
+        mode = self._conversion_dict.get(key)
+        if mode is None:
+            mode = self._conversion_dict[key] = analyze_alpha(image)
+        return convert_image(image, mode)
+
+    def _find(self, name):
+        """ Find the first file matching the given name """
+        root, ext = os.path.splitext(name)
+        valid_files = (r+e for r, e in self._files
+                       if r == root and e.startswith(ext))
+        return next(valid_files, None)
+
+    def _loaditerator(self, recursive=True):
+        """ Iter over the files to load, without tracing them """
+        files = (self._getfile(root) for root, ext in self._files)
+        if not recursive:
+            return files
+        subiterators = (sub._loaditerator()
+                        for sub in self._subdir_dict.itervalues())
+        return chain(files, *subiterators)
+
+    def _getpath(self, path, formatting=None):
+        """ Load a file given its path relative to this handler """
+        dirs, name = path.split("/")[:-1], path.split("/")[-1]
+        handler = self
+        for subdir in dirs:
+            handler = handler.getdir(subdir)
+            if handler is None:
+                return None
+        return handler._getfile(name, formatting)
+
     def _join(self, name, ext=""):
         return os.path.join(self._dir, name+ext)
 
@@ -152,6 +704,12 @@ class ResourceHandler:
             return os.path.join(sys._MEIPASS, path)
         return path
 
+    def _open(self, name):
+        """ Return a file-like object if packed, a path otherwise """
+        if self._pack:
+            return self._pack.open(self._join(name))
+        return self._resource_path(name)
+
     def _format_ext(self, ext):
         """ Format the extension """
         if ext.startswith("."):
@@ -222,26 +780,36 @@ class ResourceHandler:
     def load_image(self, name, size=None):
         # Native image requested
         if size is None:
-            image = pygame.image.load(self._resource_path(name))
-            return image.convert_alpha()
+            image = pygame.image.load(self._open(name), name)
+            return self._convert(name, image)
         # Get native image
-        raw_image = self.getfile(name)
+        raw_image = self._getfile(name)
         # No transformation case
         if size == raw_image.get_size():
             return raw_image
         # Scale image
-        return pygame.transform.smoothscale(raw_image, size)
+        return rescale(raw_image, size, self.scale_quality)
 
     def load_font(self, name, size=72):
         if not pygame.font.get_init():
             pygame.font.init()
-        return pygame.font.Font(self._resource_path(name), size)
+        return pygame.font.Font(self._open(name), size)
 
     def load_music(self, name, formatting=None):
-        return pygame.mixer.music.load(self._resource_path(name))
+        return pygame.mixer.music.load(self._open(name))
 
     def load_file(self, name, spliter='\n'):
-        string = open(self._resource_path(name)).read()
+        """ Return the content of a text file as a native string,
+        split by spliter unless it is None """
+        if self._pack:
+            data = self._open(name).readbuffer()
+        else:
+            with open(self._resource_path(name), "rb") as stream:
+                data = stream.read()
+        if str is bytes:
+            string = str(data)
+        else:
+            string = codecs.utf_8_decode(data)[0]
         if spliter is None:
             return string
         return string.split(spliter)
@@ -0,0 +1,148 @@
+"""Module for the jobs spread over several ticks of a state."""
+
+from timeit import default_timer
+from itertools import count
+
+
+class Job(object):
+    """Generator-based job run by a scheduler.
+
+    The generator does a bit of work between two yields. It may yield a
+    number between 0 and 1 to report its progress.
+
+    Args:
+        generator (iterable): the work to do
+        priority (int): jobs with higher priorities run first
+            (default is 0)
+        callback (func or None): called with the job when it is done
+            (default is None)
+        name (str or None): name of the job (default is None)
+
+    Attributes:
+     - **progress** : last progress reported, 1.0 when done
+     - **steps** : number of steps run so far
+     - **done** : True when the generator is exhausted or the job cancelled
+    """
+
+    def __init__(self, generator, priority=0, callback=None, name=None):
+        self.generator = iter(generator)
+        self.priority = priority
+        self.callback = callback
+        self.name = name
+        self.progress = 0.
+        self.steps = 0
+        self.done = False
+
+    def step(self):
+        """Run the job until its next yield.
+
+        Return:
+            bool: True if the job is done
+        """
+        try:
+            value = next(self.generator)
+        except StopIteration:
+            self.finish()
+            return True
+        self.steps += 1
+        if isinstance(value, (int, float)):
+            self.progress = min(max(float(value), 0.), 1.)
+        return False
+
+    def finish(self):
+        """Run the remaining steps at once."""
+        if self.done:
+            return
+        for _ in self.generator:
+            self.steps += 1
+        self.done = True
+        self.progress = 1.
+        if callable(self.callback):
+            self.callback(self)
+
+    def cancel(self):
+        """Stop the job, without calling the callback."""
+        self.done = True
+        if hasattr(self.generator, "close"):
+            self.generator.close()
+
+    def __repr__(self):
+        return "Job({!r}, progress={:.2f})".format(self.name, self.progress)
+
+
+class Scheduler(object):
+    """Run the steps of the pending jobs, within a time budget per tick.
+
+    The jobs run in priority order, and in the order they were added for
+    equal priorities. Each call to **run** executes at least one step,
+    so the jobs always make progress, then stops as soon as the budget is
+    exceeded. An exception raised by a job is propagated, and the job is
+    discarded.
+
+    Args:
+        budget (float): time budget per tick, in seconds (default is 0.004)
+        clock (func): time function (default is timeit.default_timer)
+    """
+
+    def __init__(self, budget=0.004, clock=default_timer):
+        self.budget = budget
+        self.clock = clock
+        self.jobs = []
+        self._counter = count()
+
+    def add(self, generator, priority=0, callback=None, name=None):
+        """Schedule a generator or a Job, and return the job."""
+        job = generator
+        if not isinstance(job, Job):
+            job = Job(generator, priority, callback, name)
+        self.jobs.append((-job.priority, next(self._counter), job))
+        self.jobs.sort(key=lambda entry: entry[:2])
+        return job
+
+    @property
+    def busy(self):
+        """True if some jobs are pending."""
+        return bool(self.jobs)
+
+    @property
+    def progress(self):
+        """Mean progress of the pending jobs, 1.0 if there is none."""
+        if not self.jobs:
+            return 1.
+        return sum(job.progress for _, _, job in self.jobs) / len(self.jobs)
+
+    def run(self, budget=None):
+        """Run the pending jobs until the budget is exceeded.
+
+        Args:
+            budget (float or None): time budget, in seconds
+                (default is the scheduler budget)
+        Return:
+            list: the jobs completed during this call
+        """
+        budget = self.budget if budget is None else budget
+        deadline = self.clock() + budget
+        completed = []
+        while self.jobs:
+            job = self.jobs[0][2]
+            try:
+                done = job.done or job.step()
+            except Exception:
+                self.jobs.pop(0)
+                raise
+            if done:
+                self.jobs.pop(0)
+                completed.append(job)
+            if self.clock() >= deadline:
+                break
+        return completed
+
+    def flush(self):
+        """Complete all the pending jobs."""
+        while self.jobs:
+            self.jobs.pop(0)[2].finish()
+
+    def cancel(self):
+        """Cancel all the pending jobs."""
+        while self.jobs:
+            self.jobs.pop(0)[2].cancel()
@@ -1,5 +1,6 @@
 import pygame
 from mvctools.common import xytuple, Color
+from mvctools.resource import rescale, SMOOTH, FAST
 
 class BaseSettings(object):
     def __init__(self, control):
@@ -9,6 +10,9 @@ class BaseSettings(object):
         self._height = 720
         self._fullscreen = False
         self._native_ratio = None
+        self._scale_quality = SMOOTH
+        self._logical_size = None
+        self.render_target = None
 
     @property
     def width(self):
@@ -31,6 +35,25 @@ class BaseSettings(object):
             self._width, self._height = value
             self.apply()
 
+    @property
+    def logical_size(self):
+        return self._logical_size
+
+    @logical_size.setter
+    def logical_size(self, value):
+        if isinstance(value, basestring):
+            value = value.lower()
+            value = None if value == "none" else map(int, value.split('x'))
+        if value is not None:
+            value = xytuple(*value)
+        if value != self.logical_size:
+            self._logical_size = value
+            self.apply()
+
+    @property
+    def render_size(self):
+        return self.logical_size or self.size
+
     @property
     def fps(self):
         return self._fps
@@ -76,9 +99,30 @@ class BaseSettings(object):
             self._native_ratio = value
             self.apply()
 
+    @property
+    def scale_quality(self):
+        return self._scale_quality
+
+    @scale_quality.setter
+    def scale_quality(self, value):
+        if isinstance(value, basestring):
+            value = value.lower()
+        if value not in (SMOOTH, FAST):
+            raise ValueError
+        if value != self.scale_quality:
+            self._scale_quality = value
+            self.control.resource.set_quality(value)
+            self.apply()
+
+    # Scale quality alias
+    quality = scale_quality
+
     def string_setting(self, name, default=None):
         if name in ["size"]:
             return "x".join(map(str, self.size))
+        if name in ["logical_size"]:
+            size = self.logical_size
+            return "x".join(map(str, size)) if size else "none"
         if name in ["fullscreen", "mode"]:
             return {True: "fullscreen", False: "windowed"}.get(self.mode)
         if name in ["fps"]:
@@ -87,25 +131,31 @@ class BaseSettings(object):
             return str(self.width)
         if name in ["height"]:
             return str(self.height)
+        if name in ["scale_quality", "quality"]:
+            return self.scale_quality
         return default
 
     def apply(self):
-        if pygame.display.get_surface():
+        if self.control.display.get_surface():
             self.set_mode()
             self.control.reload()
 
     def set_mode(self):
         flag = pygame.FULLSCREEN if self.fullscreen else 0
-        pygame.display.set_mode(self.size, flag)
-        
+        screen = self.control.display.set_mode(self.size, flag)
+        self.render_target = screen
+        if self.logical_size and self.logical_size != self.size:
+            target = pygame.Surface(self.logical_size)
+            self.render_target = target.convert(screen)
+
 
     def scale_as_background(self, image=None, color=None):
         if not image and not color:
             return None
         color = Color(color)
-        bgd = pygame.Surface(self.size)
+        bgd = pygame.Surface(self.render_size)
         bgd.fill(color)
         if image is not None:
-            scaled = pygame.transform.smoothscale(image, self.size)
+            scaled = rescale(image, self.render_size, self.scale_quality)
             bgd.blit(scaled, scaled.get_rect())
         return bgd
@@ -1,12 +1,40 @@
 import pygame as pg
+from itertools import count
 from pygame.sprite import DirtySprite
-from pygame import Rect, Surface, transform
-from mvctools.common import xytuple, cachedict
+from pygame import Rect, Surface
+from mvctools.common import xytuple
+from mvctools.cache import Cache, surface_size
+from mvctools.resource import rescale, SMOOTH
+
+
+# Order of the sprites joining a layer, to sort the sprites of equal layers
+# across groups as a single layered group would
+_sequence = count()
+
+# Names of the rect attributes, like x, size or center
+RECT_ATTRIBUTES = frozenset(name for name in dir(Rect)
+                            if not name.startswith("_") and
+                            type(getattr(Rect, name)) is type(Rect.x))
 
 
 class AutoSprite(DirtySprite):
+    """Sprite updating its image, rect and layer from its model.
+
+    The attributes of the sprite and of its DirtySprite base are stored in
+    slots. A subclass defining its own **__slots__** has no instance
+    dictionary, the other subclasses get one as usual.
+    """
+
+    __slots__ = ("dirty", "blendmode", "source_rect", "_visible", "_layer",
+                 "_Sprite__g", "_image", "_rect", "parent", "view", "group",
+                 "sequence", "model", "children", "world_image",
+                 "world_rect")
 
     size_ratio = None
+    static = False
+    world = False
+    cull = False
+    pool_size = 0
 
     def __init__(self, parent, *args, **kwargs):
         super(AutoSprite, self).__init__()
@@ -15,21 +43,27 @@ class AutoSprite(DirtySprite):
         # Internal variables
         self._image = Surface((0,0))
         self._rect = Autorect(self.image.get_rect())
+        self._rect.register(self)
         self._layer = 0
+        # World space image and rect, for world sprites only
+        if self.world:
+            self.world_image = self._image
+            self.world_rect = Rect(self._rect)
         # Parent handling
         self.parent = parent
+        self.view = parent
         if isinstance(parent, AutoSprite):
             parent.register_child(self)
             self._layer = parent.layer
+            self.view = parent.view
         # Group handling
-        self.group = parent.group
+        self.group = self.view.get_group(self)
+        self.sequence = next(_sequence)
         self.group.add(self)
+        if self.cull:
+            self.view.camera.register(self)
         # Model
         self.model = model if model else parent.model
-        # Resource
-        self.resource = parent.resource
-        # Settings
-        self.settings = parent.settings
         # Children
         self.children = []
         # Init
@@ -39,32 +73,70 @@ class AutoSprite(DirtySprite):
         pass
 
     def update(self):
+        if self.world:
+            return self.view.camera.update_sprite(self)
         self.image = self.get_image()
         self.rect = self.get_rect()
         self.layer = self.get_layer()
 
     def kill(self):
         [child.kill() for child in self.children]
+        if self.cull:
+            self.view.camera.unregister(self)
         super(AutoSprite, self).kill()
 
+    def reuse(self, model):
+        """Bind a killed sprite to a new model.
+
+        The sprite is added back to its group and the **on_reuse** method
+        is called to reset it for the new model.
+        """
+        self.model = model
+        self.dirty = 1
+        self.sequence = next(_sequence)
+        self.group.add(self)
+        if self.cull:
+            self.view.camera.register(self)
+        self.on_reuse()
+
+    def on_reuse(self):
+        """Reset the sprite for its new model.
+
+        The children are dropped and **init** is called again, so all the
+        state set up in init (children, animations bound to the timers of
+        the old model, ...) is rebuilt. Override it with a cheaper reset
+        if the sprite allows it.
+        """
+        self.children = []
+        self.init()
+
     def register_child(self, child):
         self.children.append(child)
 
+    # Shared attributes
+
+    @property
+    def resource(self):
+        return self.view.resource
+
+    @property
+    def settings(self):
+        return self.view.settings
+
     # Access autorect properties
 
     def __getattr__(self, attr):
-        if hasattr(Autorect, attr) and \
-           isinstance(getattr(Autorect, attr), property):
+        if attr in RECT_ATTRIBUTES:
             return getattr(self.rect, attr)
         raise AttributeError(attr)
 
     # Method to override
 
     def get_rect(self):
-        return self.rect
+        return self.world_rect if self.world else self.rect
     
     def get_image(self):
-        return self.image
+        return self.world_image if self.world else self.image
 
     def get_layer(self):
         return self.layer
@@ -81,7 +153,8 @@ class AutoSprite(DirtySprite):
         if timer is None:
             timer = self.model.lifetime
         size = self.size if resize else None
-        return Animation(resource, timer, inf, sup, looping, size)
+        return Animation(resource, timer, inf, sup, looping, size,
+                         self.settings.scale_quality)
 
     def scale_resource(self, resource, name, size=None):
         size = self.size if size is None else None
@@ -91,7 +164,7 @@ class AutoSprite(DirtySprite):
     def size(self):
         if not self.size_ratio:
             return xytuple(*self.image.get_size())
-        return (self.settings.size * self.size_ratio).map(int)
+        return (self.settings.render_size * self.size_ratio).truncated()
             
 
     # Layer property
@@ -106,6 +179,7 @@ class AutoSprite(DirtySprite):
             layer = 0
         if self._layer != layer:
             self._layer = layer
+            self.sequence = next(_sequence)
             self.group.change_layer(self, layer)
             
     @layer.deleter
@@ -143,29 +217,76 @@ class AutoSprite(DirtySprite):
     @rect.setter
     def rect(self, rect):
         if rect is None:
-            rest = Autorect(self.image.get_rect())
-        is_autorect = isinstance(rect, Autorect)
-        if rect != self._rect:
-            self.set_dirty()
-            if not is_autorect:
-                self._rect.size = rect.size
-                self._rect.topleft = rect.topleft
-        if is_autorect and rect is not self._rect:
+            rect = Autorect(self.image.get_rect())
+        if isinstance(rect, Autorect) and rect is not self._rect:
+            if rect != self._rect:
+                self.set_dirty()
+            self._rect.unregister(self)
             rect.register(self)
             self._rect = rect
+        elif rect != self._rect:
+            self._rect.size = rect.size
+            self._rect.topleft = rect.topleft
 
     @rect.deleter
     def rect(self):
         del self._rect
 
 
+class SpritePool(object):
+    """Pool of the killed sprites of a given class, reused for new models.
+
+    Args:
+        cls (type): the AutoSprite subclass
+        size (int): maximum number of sprites kept in the pool
+    """
+
+    def __init__(self, cls, size):
+        self.cls = cls
+        self.size = size
+        self.free = []
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self, parent, model):
+        """Return a sprite for the given model, reused if possible."""
+        if self.free:
+            self.hits += 1
+            sprite = self.free.pop()
+            sprite.reuse(model)
+            return sprite
+        self.misses += 1
+        return self.cls(parent, model=model)
+
+    def release(self, sprite):
+        """Kill a sprite and keep it for later use, if the pool is not full."""
+        sprite.kill()
+        if len(self.free) < self.size:
+            self.free.append(sprite)
+
+    @property
+    def hit_rate(self):
+        """Ratio of the acquired sprites that have been reused."""
+        total = self.hits + self.misses
+        return float(self.hits) / total if total else 0.
+
+    @property
+    def stats(self):
+        return {"size": self.size,
+                "free": len(self.free),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hit_rate}
+
+
 class Animation(object):
 
-    def __init__(self, resource, timer,
-                 inf=None, sup=None, looping=True, size=None):
+    def __init__(self, resource, timer, inf=None, sup=None,
+                 looping=True, size=None, quality=SMOOTH):
         # Set attributes
         self.resource = resource
         self.size = size
+        self.quality = quality
         self.timer = timer
         start, stop = timer.get_interval()
         self.inf = start if inf is None else inf
@@ -173,7 +294,8 @@ class Animation(object):
         self.looping = looping
         # Set cache
         if isinstance(resource, list):
-            self.cache = cachedict(self.scale_image)
+            self.cache = Cache(self.scale_image, sizeof=surface_size,
+                               name="animation")
         else:
             self.cache = self.resource
 
@@ -181,7 +303,7 @@ class Animation(object):
         raw = self.resource[index]
         if not size or size == raw.get_size():
             return raw
-        return transform.smoothscale(raw, size)
+        return rescale(raw, size, self.quality)
 
     def get(self):
         normalized = (self.timer.get() - self.inf) / (self.sup - self.inf)
@@ -201,55 +323,46 @@ class Animation(object):
         return self.cache[index, self.size]
 
 
-
-class UpgradingMetaClass(type):
-    def __new__(metacls, name, bases, attrs):
-        cls = type(name, bases, attrs)  
-        for name in dir(cls):
-            attr = getattr(cls, name)
-            if type(attr) in cls.upgrade_dict:
-                func = cls.upgrade_dict[type(attr)]
-                if not callable(func):
-                    func = func.__func__
-                setattr(cls, name, func(attr))
-        return cls
-        
-    
 class Autorect(Rect):
+    """Rect flagging the sprites registered on it as dirty when it changes.
+
+    The writes are not intercepted. Instead, the rect is compared once per
+    frame with its state at the previous poll, by the view (see
+    BaseView.poll_rects), after the sprites are updated. Hence, in-place
+    changes are detected as well, whoever makes them. If it changed, the
+    generation counter is incremented and all the registered sprites are
+    notified at once.
+    """
+
+    __slots__ = ("sprites", "generation", "_state")
 
     def __init__(self, *args, **kwargs):
         super(Autorect, self).__init__(*args, **kwargs)
         self.sprites = []
+        self.generation = 0
+        self._state = Rect(self)
 
     def notify(self):
         [sprite.set_dirty() for sprite in self.sprites]
 
     def register(self, sprite):
-        self.sprites.append(sprite)
-
-    __metaclass__ = UpgradingMetaClass
-    
-    @staticmethod
-    def upgrade_descriptor(descriptor):
-        def setter(obj, value):
-            if descriptor.__get__(obj) != value:
-                obj.notify()
-            descriptor.__set__(obj, value)
-        return property(descriptor.__get__, setter, descriptor.__delete__)
-
-    @staticmethod
-    def upgrade_method(method):
-        if not method.__name__.endswith('_ip'):
-            return method
-        def wrapper(self, *args, **kwargs):
-            temp = Rect.copy(self)
-            res = method(self, *args, **kwargs)
-            if temp != self:
-                self.notify()
-            return res
-        return wrapper
-
-    descriptor_type = type(Rect.x)
-    method_type = type(Rect.move)
-    upgrade_dict = {descriptor_type: upgrade_descriptor,
-                    method_type: upgrade_method}
+        if sprite not in self.sprites:
+            self.sprites.append(sprite)
+
+    def unregister(self, sprite):
+        if sprite in self.sprites:
+            self.sprites.remove(sprite)
+
+    def poll(self):
+        """Notify the registered sprites if the rect changed since the last
+        poll.
+
+        Return:
+            bool: True if the rect changed
+        """
+        if self == self._state:
+            return False
+        self._state = Rect(self)
+        self.generation += 1
+        self.notify()
+        return True
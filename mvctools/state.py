@@ -1,8 +1,9 @@
 
 import pygame
-from mvctools.model import BaseModel
+from mvctools.model import BaseModel, StateContext
 from mvctools.controller import BaseController
 from mvctools.view import BaseView
+from mvctools.scheduler import Scheduler
 
 
 class NextStateException(Exception):
@@ -26,19 +27,40 @@ class BaseState(object):
     controller_class = BaseController
     view_class = BaseView
     clock_class = pygame.time.Clock
+    scheduler_class = Scheduler
+    schedule_budget = 0.004
+    pipelined = False
     
     def __init__(self, control):
+        for _ in self.build(control):
+            pass
+
+    def build(self, control):
+        """Build the state step by step, yielding the progress.
+
+        It lets the control prepare the state ahead of time, see
+        BaseControl.prepare_next_state.
+        """
         self.control = control
+        self.context = StateContext(self)
+        self.scheduler = self.scheduler_class(self.schedule_budget)
+        self.current_fps = self.control.settings.fps
+        self.ticking = False
+        yield 0.
         self.model = self.model_class(self)
+        yield 0.5
         self.controller = self.controller_class(self, self.model)
+        yield 0.6
         self.view = self.view_class(self, self.model)
-        self.current_fps = self.control.settings.fps
-        self.ticking = False
+        yield 1.
 
     def tick(self):
-        mvc = self.controller, self.model, self.view
         with TickContext(self):
-            return any(entity._update() for entity in mvc)
+            if self.controller._update() or self.model._update():
+                return True
+            # Scheduled jobs, within the budget
+            self.scheduler.run()
+            return bool(self.view._update())
         return True
 
     def reload(self):
@@ -63,14 +85,18 @@ class BaseState(object):
         # END PROFILE
         clock.tick()
         # Loop over the state ticks
-        while not self.tick():
-            millisec = clock.tick(self.control.settings.fps)
-            if millisec:
-                self.current_fps = 1000.0/millisec
-            rate = clock.get_fps()
-            if rate and string:
-                    caption = string.format(int(rate))
-                    pygame.display.set_caption(caption)
+        try:
+            while not self.tick():
+                millisec = clock.tick(self.control.settings.fps)
+                if millisec:
+                    self.current_fps = 1000.0/millisec
+                rate = clock.get_fps()
+                if rate and string:
+                        caption = string.format(int(rate))
+                        self.control.display.set_caption(caption)
+        finally:
+            # Wait for the render thread
+            self.view.close()
         # PROFILE
 ##        pr.disable()
 ##        s = StringIO.StringIO()
@@ -0,0 +1,144 @@
+"""Module for the tile maps exported as text by the Tiled map editor.
+
+The maps are parsed once into compact typed arrays and cached with the
+modification time of their source, so reloading a level doesn't parse
+any text.
+"""
+
+from array import array
+from mvctools.cache import Cache
+
+
+class TileLayer(object):
+    """Layer of a tile map.
+
+    Args:
+        name (str): name of the layer
+        width (int): number of columns
+        height (int): number of lines
+        data (array): tile values, line by line
+    """
+
+    def __init__(self, name, width, height, data):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.data = data
+
+    def get(self, i, j):
+        """Get the tile value at line i and column j."""
+        return self.data[i*self.width + j]
+
+    def iter_tiles(self, border=None):
+        """Iterate over the (line, column, value) tuples of the layer.
+
+        Args:
+            border (int or None): if not None, the layer is surrounded
+                                  with tiles of this value, and the
+                                  coordinates are shifted accordingly
+        """
+        width, data = self.width, self.data
+        if border is None:
+            for i in range(self.height):
+                offset = i*width
+                for j in range(width):
+                    yield i, j, data[offset+j]
+            return
+        for j in range(width+2):
+            yield 0, j, border
+        for i in range(self.height):
+            offset = i*width
+            yield i+1, 0, border
+            for j in range(width):
+                yield i+1, j+1, data[offset+j]
+            yield i+1, width+1, border
+        for j in range(width+2):
+            yield self.height+1, j, border
+
+    def __len__(self):
+        return len(self.data)
+
+
+class TileMap(object):
+    """Tile map with its header, tilesets and layers.
+
+    Attributes:
+        header (dict): header metadata, with integer values when possible
+        tilesets (list): raw tileset definitions
+        layers (list): the TileLayer objects, in order
+    """
+
+    def __init__(self, header, tilesets, layers):
+        self.header = header
+        self.tilesets = tilesets
+        self.layers = layers
+
+    @property
+    def width(self):
+        return self.header["width"]
+
+    @property
+    def height(self):
+        return self.header["height"]
+
+    def get_layer(self, name=None):
+        """Get a layer from its name, or the first layer if name is None."""
+        if name is None:
+            return self.layers[0]
+        return next(layer for layer in self.layers if layer.name == name)
+
+    def iter_tiles(self, border=None):
+        """Iterate over the tiles of the first layer."""
+        return self.get_layer().iter_tiles(border)
+
+    @classmethod
+    def parse(cls, lines):
+        """Parse the lines of a Tiled text export."""
+        header, tilesets, layers = {}, [], []
+        section, layer = None, None
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            # Section
+            if line.startswith("[") and line.endswith("]"):
+                section = line[1:-1]
+                if section == "layer":
+                    layer = {"name": "", "data": array("L")}
+                    layers.append(layer)
+                continue
+            # Layer data
+            key, sep, value = line.partition("=")
+            if section == "layer" and (not sep or key == "data"):
+                values = value if sep else line
+                layer["data"].extend(int(x) for x in values.split(",") if x)
+            # Metadata
+            elif section == "header":
+                header[key] = int(value) if value.isdigit() else value
+            elif section == "tilesets":
+                tilesets.append(value)
+            elif section == "layer" and key == "type":
+                layer["name"] = value
+        width, height = header.get("width"), header.get("height")
+        layers = [TileLayer(layer["name"], width, height, layer["data"])
+                  for layer in layers]
+        return cls(header, tilesets, layers)
+
+
+# Cache
+
+map_cache = Cache(maxsize=32, name="tilemap")
+
+def get_map(path, mtime, load):
+    """Get a compiled tile map from the cache.
+
+    Args:
+        path (str): path of the map file
+        mtime (float): modification time of the map file
+        load (func): function returning the lines of the map file
+    """
+    key = path, mtime
+    tilemap = map_cache.get(key)
+    if tilemap is None:
+        tilemap = map_cache[key] = TileMap.parse(load())
+    return tilemap
@@ -3,6 +3,7 @@ This module gathers all non-generic components of mvctools.
 They provide a basis for renderer and menu handling
 """
 from mvctools.utils.renderer import RendererSprite
+from mvctools.utils.background import ScrollingBackgroundSprite
 from mvctools.utils.menu import BaseMenuController, BaseMenuModel
 from mvctools.utils.menu import BaseMenuSprite, BaseMenuView, BaseMenuState
 from mvctools.utils.menu import BaseEntryModel, BaseEntrySprite
@@ -0,0 +1,101 @@
+from mvctools.sprite import AutoSprite
+from mvctools.common import xytuple, Color
+from pygame import Surface, transform
+
+
+class ScrollingBackgroundSprite(AutoSprite):
+    """Background made of tiled layers scrolling with parallax.
+
+    Each layer keeps a single tile, drawn by a grid of child sprites just
+    large enough to cover the screen. The child sprites are moved and
+    wrapped around according to the offset, so only the visible parts of
+    the tiles are blitted.
+
+    These class attributes may be useful to override:
+     - **background** : name of the image for a single layer
+     - **layers** : list of (image name, parallax factor) tuples, from the
+       farthest layer to the nearest (default is the background with a
+       factor of 1)
+     - **tile_ratio** : size of a tile, relative to the screen size
+       (default is (1, 1))
+     - **mirror** : alternate mirrored tiles, for images that are not
+       seamless (default is False)
+     - **flatten** : draw the farthest layer on the background color of
+       the view, so its tiles are blitted without blending. It only applies
+       to views with a background color and no background image
+       (default is True)
+     - **image_folder** : folder of the images (default is "image")
+
+    The method **get_offset** has to be overriden to scroll the layers.
+    """
+
+    background = None
+    layers = None
+    tile_ratio = 1, 1
+    mirror = False
+    flatten = True
+    image_folder = "image"
+
+    def init(self):
+        self.layer = -1
+        layers = self.layers or [(self.background, 1)]
+        self.tile_size = (self.settings.render_size * self.tile_ratio)
+        self.tile_size = self.tile_size.truncated()
+        self.tiles = [self.build_tiles(name, not index)
+                      for index, (name, _) in enumerate(layers)]
+        self.factors = [factor for _, factor in layers]
+        # Grid of sprites covering the screen
+        grid = self.settings.render_size / self.tile_size.map(float)
+        grid = grid.ceiled() + (1, 1)
+        for index in range(len(layers)):
+            for i in range(grid.x):
+                for j in range(grid.y):
+                    BackgroundTileSprite(self, index, xytuple(i, j))
+
+    def build_tiles(self, name, farthest=False):
+        """Return the tile of a layer, indexed by its mirroring in x and y."""
+        folder = self.resource.getdir(self.image_folder)
+        tile = folder.getfile(name, self.tile_size)
+        view = self.view
+        if farthest and self.flatten and view.bgd_color and not view.bgd_image:
+            flat = Surface(tile.get_size()).convert()
+            flat.fill(Color(view.bgd_color))
+            flat.blit(tile, (0, 0))
+            tile = flat
+        if not self.mirror:
+            return {(x, y): tile for x in (0, 1) for y in (0, 1)}
+        return {(x, y): transform.flip(tile, x, y) if x or y else tile
+                for x in (0, 1) for y in (0, 1)}
+
+    def get_offset(self):
+        """Return the scrolling offset, in pixels."""
+        return xytuple(0, 0)
+
+
+class BackgroundTileSprite(AutoSprite):
+    """Tile of a scrolling background, at a given position in the grid."""
+
+    def init(self, index, cell):
+        self.index = index
+        self.cell = cell
+        self.tile = cell
+
+    def update(self):
+        self.tile = self.get_tile()
+        super(BackgroundTileSprite, self).update()
+
+    def get_tile(self):
+        factor = self.parent.factors[self.index]
+        offset = self.parent.get_offset() * (factor, factor)
+        first = offset / self.parent.tile_size.map(float)
+        return first.floored() + self.cell
+
+    def get_image(self):
+        mirror = self.tile.x % 2, self.tile.y % 2
+        return self.parent.tiles[self.index][mirror]
+
+    def get_rect(self):
+        factor = self.parent.factors[self.index]
+        offset = self.parent.get_offset() * (factor, factor)
+        topleft = self.tile * self.parent.tile_size - offset
+        return self.image.get_rect(topleft=topleft.floored())
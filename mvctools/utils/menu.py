@@ -153,7 +153,7 @@ class BaseMenuSprite(RendererSprite):
 
     @property
     def center(self):
-        return (self.settings.size * self.position_ratio).map(int)
+        return (self.settings.render_size * self.position_ratio).truncated()
         
 # Secondary sprite
 
@@ -181,12 +181,12 @@ class BaseEntrySprite(RendererSprite):
 
     @property
     def midleft(self):
-        first = (self.settings.size * self.first_entry_position_ratio)
-        shift =  (self.settings.size * self.relative_position_ratio)
-        return (first + shift * ((self.model.pos,)*2)).map(int)
+        first = (self.settings.render_size * self.first_entry_position_ratio)
+        shift =  (self.settings.render_size * self.relative_position_ratio)
+        return (first + shift * self.model.pos).truncated()
 
     def build_renderer(self, selection):
-        size = int(self.settings.size.y * self.font_ratios[selection])
+        size = int(self.settings.render_size.y * self.font_ratios[selection])
         return super(BaseEntrySprite, self).build_renderer(size=size)
 
 # View
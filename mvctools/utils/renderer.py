@@ -1,5 +1,5 @@
 from mvctools.sprite import AutoSprite
-from mvctools.common import cache
+from mvctools.cache import Cache, surface_size
 from pygame import Color, transform
 
 
@@ -9,13 +9,14 @@ class RendererSprite(AutoSprite):
     font_name = ""
     font_ratio = 0.0
     font_color = "black"
+    cache_size = 64
   
     def init(self):
         self.renderer = self.build_renderer()
 
     @property
     def font_size(self):
-        return int(self.settings.height * self.font_ratio)
+        return int(self.settings.render_size.y * self.font_ratio)
 
     def build_renderer(self, name=None, size=None, color=None,
                              native_ratio=None, cached=True):
@@ -36,7 +37,8 @@ class RendererSprite(AutoSprite):
             if native_ratio is None:
                 return raw
             # Ratio between native ratio and current ratio
-            current_ratio = float(self.settings.width)/self.settings.height
+            width, height = self.settings.render_size
+            current_ratio = float(width)/height
             ratio = current_ratio/native_ratio
             # Already native case
             if ratio == 1:
@@ -46,5 +48,7 @@ class RendererSprite(AutoSprite):
             return transform.smoothscale(raw, img_size)
         # Activate caching if needed
         if cached:
-            return cache(renderer)
+            cache = Cache(maxsize=self.cache_size, sizeof=surface_size,
+                          name="renderer")
+            return cache.wrap(renderer)
         return renderer
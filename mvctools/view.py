@@ -1,16 +1,27 @@
-import pygame as pg
 from pygame.sprite import LayeredDirty, DirtySprite
 from pygame import Rect, Surface, transform
 from functools import partial
+from math import ceil
 from mvctools.common import xytuple, cachedict, Color
+from mvctools.dirty import DirtyRegionManager
+from mvctools.group import StaticGroup, BufferedGroup, draw_order
+from mvctools.pipeline import FrameSnapshot, RenderPipeline
+from mvctools.camera import Camera
+from mvctools.sprite import SpritePool
+from mvctools.resource import SMOOTH
 
-AutoGroup = partial(LayeredDirty, _use_updates = True, _time_threshold = 1000)
+AutoGroup = partial(BufferedGroup, _use_updates = True, _time_threshold = 1000)
 
 class BaseView(object):
     
     bgd_image = None
     bgd_color = None
     sprite_class_dct = {}
+    group_class = AutoGroup
+    time_threshold = 1000
+    dirty_manager_class = DirtyRegionManager
+    pipeline_class = RenderPipeline
+    camera_class = Camera
 
     def __init__(self, state, model):
         # Attributes to higher instances
@@ -21,10 +32,20 @@ class BaseView(object):
         self.settings = self.control.settings
         # View-related attributes
         self.sprite_dct = {}
-        self.group = AutoGroup()
-        self.screen = pg.display.get_surface()
+        self.pool_dct = {}
+        self.group = self.group_class(_time_threshold=self.time_threshold)
+        self.static_group = StaticGroup()
+        self.display = self.control.display.get_surface()
+        self.screen = self.settings.render_target or self.display
+        self.dirty_manager = self.dirty_manager_class(self.display.get_rect(),
+                                                      self.control.display)
+        self.camera = self.camera_class(self)
         self.background = self.get_background()
         self.first_update = True
+        # Render thread
+        self.pipeline = None
+        if getattr(state, "pipelined", False):
+            self.pipeline = self.pipeline_class(self)
         # Call user initialisation
         self.init()
 
@@ -36,24 +57,193 @@ class BaseView(object):
         return self.settings.scale_as_background(image, self.bgd_color)
 
     def _reload(self):
-        self.__init__(self, self.model)
+        self.close()
+        self.__init__(self.state, self.model)
+
+    def close(self):
+        if self.pipeline:
+            self.pipeline.close()
+            self.pipeline = None
 
     def _update(self):
-        # Handle parameter
-        self.group._use_update = not self.first_update
-        self.first_update = False
-        # Update, draw and display
+        # Update sprites
         self.gen_sprites()
+        self.camera.cull()
         self.group.update()
-        dirty = self.group.draw(self.screen, self.background)
-        pg.display.update(dirty)
+        self.static_group.update()
+        self.poll_rects()
+        # Let the render thread draw the frame
+        if self.pipeline:
+            return self.pipeline.submit(FrameSnapshot(self))
+        # Let the renderer draw the frame from textures
+        if self.is_textured():
+            return self.render_textures()
+        # Redraw the areas where the static layer changed
+        if self.camera.moved:
+            self.static_group.invalidate()
+        size = self.screen.get_size()
+        for rect in self.static_group.compose(self.background, size):
+            self.group.repaint_rect(rect)
+        background = self.static_group.cache or self.background
+        # Handle parameter
+        self.group._use_update = not (self.first_update or self.camera.moved)
+        self.first_update = False
+        # Draw and display
+        dirty = self.group.draw(self.screen, background)
+        self.static_group.repair(self.screen, self.background, self.group, dirty)
+        if self.screen is not self.display:
+            dirty = self.present(dirty)
+        self.dirty_manager.update(dirty)
+
+    def poll_rects(self):
+        """Flag the sprites whose rect changed since the last frame.
+
+        Each rect is compared once per frame with its previous state, so
+        the rects changed in place are detected as well.
+        """
+        for group in (self.static_group, self.group):
+            for sprite in group.sprites():
+                sprite.rect.poll()
+
+    def is_textured(self):
+        """Check whether the frame can be drawn from textures.
+
+        It requires a backend with a renderer, no logical size, a
+        background, and no visible sprite with a blend mode or an image
+        the renderer can't draw as a blit would.
+        """
+        display = self.control.display
+        if not getattr(display, "textured", False):
+            return False
+        if self.screen is not self.display or self.background is None:
+            return False
+        if not display.can_render(self.background):
+            return False
+        for group in (self.static_group, self.group):
+            for sprite in group.sprites():
+                if not sprite.visible:
+                    continue
+                if sprite.blendmode or not display.can_render(sprite.image):
+                    return False
+        return True
+
+    def render_textures(self):
+        """Draw the whole frame with the renderer of the display backend.
+
+        The static sprites are drawn along with the others, in the drawing
+        order of the groups, so the static cache is not used.
+        """
+        sprites = self.static_group.sprites() + self.group.sprites()
+        visible = []
+        for sprite in sprites:
+            if sprite.visible and all(sprite.image.get_size()):
+                visible.append(sprite)
+            if sprite.dirty == 1:
+                sprite.dirty = 0
+        visible.sort(key=draw_order)
+        self.static_group.invalidate()
+        self.first_update = True
+        self.control.display.render(self.background, visible)
+
+    def present(self, rects):
+        """Scale the dirty areas of the render target to the display.
+
+        Each area is scaled with a one pixel margin, so the smooth filter
+        doesn't produce seams between the areas of successive frames.
+
+        Args:
+            rects (list): dirty rects in logical coordinates
+        Return:
+            list: dirty rects in display coordinates
+        """
+        ratio = xytuple(*self.display.get_size()).map(float)
+        ratio /= self.screen.get_size()
+        integer = not any(x % 1 for x in ratio)
+        smooth = self.settings.scale_quality == SMOOTH and not integer
+        scale = transform.smoothscale if smooth else transform.scale
+        bounds = self.screen.get_rect()
+        result = []
+        for rect in rects:
+            rect = bounds.clip(rect)
+            if not rect:
+                continue
+            source = rect.inflate(2, 2).clip(bounds) if smooth else rect
+            target = self.to_display(rect)
+            scaled_rect = self.to_display(source)
+            scaled = scale(self.screen.subsurface(source), scaled_rect.size)
+            area = target.move(-scaled_rect.x, -scaled_rect.y)
+            self.display.blit(scaled, target, area)
+            result.append(target)
+        return result
+
+    def to_display(self, rect):
+        """Convert a rect from logical to display coordinates."""
+        rx, ry = self.display.get_size()
+        rx, ry = float(rx)/self.screen.get_width(), \
+                 float(ry)/self.screen.get_height()
+        left, top = int(rect.left*rx), int(rect.top*ry)
+        right, bottom = int(ceil(rect.right*rx)), int(ceil(rect.bottom*ry))
+        return Rect(left, top, right-left, bottom-top)
+
+    def to_logical(self, pos):
+        """Convert a position from display to logical coordinates."""
+        if self.screen is self.display:
+            return pos
+        ratio = xytuple(*self.screen.get_size()).map(float)
+        ratio /= self.display.get_size()
+        return (xytuple(*pos) * ratio).truncated()
+
+    def get_stats(self):
+        return self.dirty_manager.stats
 
     def gen_sprites(self):
-        for key,obj in self.model.get_model_dct():
-            if key not in self.sprite_dct:
-                cls = self.get_sprite_class(obj)
-                if cls:
-                    self.sprite_dct[key] = cls(self, model=obj)
+        """Create the sprites of the new models.
+
+        The sprites of the models removed from the tree are released: they
+        are killed, and kept for later use if their class has a pool (see
+        AutoSprite.pool_size). Hence, a sprite no longer outlives its model.
+        """
+        sprite_dct = self.sprite_dct
+        found, new = 0, None
+        for key, obj in self.model.get_model_dct():
+            if key in sprite_dct:
+                found += 1
+                continue
+            cls = self.get_sprite_class(obj)
+            if cls:
+                new = new or []
+                new.append((key, obj, cls))
+        # Release the sprites of the removed models
+        if found < len(sprite_dct):
+            keys = set(key for key, obj in self.model.get_model_dct())
+            for key in [key for key in sprite_dct if key not in keys]:
+                self.release_sprite(sprite_dct.pop(key))
+        # Create the sprites of the new models
+        for key, obj, cls in new or ():
+            sprite_dct[key] = self.build_sprite(cls, obj)
+
+    def build_sprite(self, cls, obj):
+        if not cls.pool_size:
+            return cls(self, model=obj)
+        if cls not in self.pool_dct:
+            self.pool_dct[cls] = SpritePool(cls, cls.pool_size)
+        return self.pool_dct[cls].acquire(self, obj)
+
+    def release_sprite(self, sprite):
+        pool = self.pool_dct.get(sprite.__class__)
+        if pool:
+            pool.release(sprite)
+        else:
+            sprite.kill()
+
+    def get_pool_stats(self):
+        return dict((cls.__name__, pool.stats)
+                    for cls, pool in self.pool_dct.items())
+
+    def get_group(self, sprite):
+        if sprite.static:
+            return self.static_group
+        return self.group
 
     def get_sprite_class(self, obj):
         return self.sprite_class_dct.get(obj.__class__, None)
@@ -63,8 +253,11 @@ class BaseView(object):
         cls.sprite_class_dct[obj_cls] = sprite_cls
         
     def get_models_at(self, pos):
-        return [sprite.model
-                for sprite in reversed(self.group.get_sprites_at(pos))]
+        pos = self.to_logical(pos)
+        sprites = self.static_group.get_sprites_at(pos)
+        sprites += self.group.get_sprites_at(pos)
+        sprites.sort(key=lambda sprite: sprite.layer)
+        return [sprite.model for sprite in reversed(sprites)]
 
 
 
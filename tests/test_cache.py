@@ -0,0 +1,59 @@
+"""Tests for the caches of computed values."""
+
+import sys
+import threading
+import unittest
+
+from mvctools.cache import Cache
+
+
+class CacheThreadTest(unittest.TestCase):
+    """A cache shared by several threads stays consistent."""
+
+    def setUp(self):
+        # Switch threads as often as possible
+        if hasattr(sys, "setcheckinterval"):
+            self.interval = sys.getcheckinterval()
+            sys.setcheckinterval(1)
+        else:
+            self.interval = sys.getswitchinterval()
+            sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        if hasattr(sys, "setcheckinterval"):
+            sys.setcheckinterval(self.interval)
+        else:
+            sys.setswitchinterval(self.interval)
+
+    def test_concurrent_access(self):
+        cache = Cache(lambda key: key * 2, maxsize=50, sizeof=len,
+                      maxbytes=400)
+        errors = []
+
+        def worker(offset):
+            try:
+                for index in range(5000):
+                    key = str((index * 7 + offset) % 120)
+                    self.assertEqual(cache[key], key * 2)
+                    if index % 11 == 0:
+                        cache.get(str(index % 60))
+                    if index % 97 == 0:
+                        cache.clear()
+            except Exception:
+                errors.append(sys.exc_info()[1])
+
+        threads = [threading.Thread(target=worker, args=(offset,))
+                   for offset in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(cache), 50)
+        self.assertEqual(cache.nbytes,
+                         sum(size for _, size, _ in cache.data.values()))
+        self.assertLessEqual(cache.nbytes, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
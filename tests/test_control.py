@@ -0,0 +1,65 @@
+"""Tests for the state control."""
+
+import os
+import threading
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "disk")
+
+from mvctools.display import OffscreenBackend
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class PrepareStateTest(unittest.TestCase):
+    """A state prepared in a thread loads its resources in that thread."""
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        os.chdir(ROOT)
+        import run_examples
+        from examples.menuscreen import MenuState
+
+        class Example(run_examples.Example):
+            display_class = OffscreenBackend
+
+        self.control = Example()
+        self.control.settings.set_mode()
+        self.state = MenuState
+        self.threads = []
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+
+    def record(self, iterator):
+        # Record the thread loading each file
+        for item in iterator:
+            self.threads.append(threading.current_thread())
+            yield item
+
+    def test_threaded_loading(self):
+        iter_preload = self.control.iter_preload
+        self.control.iter_preload = lambda state: self.record(
+            iter_preload(state))
+        job = self.control.prepare_next_state(self.state, threaded=True)
+        self.assertTrue(job.done)
+        self.assertTrue(self.threads)
+        self.assertNotIn(threading.current_thread(), self.threads)
+        self.assertIs(self.control.pop_prepared_state(self.state),
+                      job.instance)
+
+    def test_threaded_error(self):
+        def failing(state):
+            for item in self.record(self.control.resource.iterload()):
+                raise IOError("cannot load")
+                yield item
+        self.control.iter_preload = failing
+        self.assertRaises(IOError, self.control.prepare_next_state,
+                          self.state, threaded=True)
+        self.assertEqual(len(self.threads), 1)
+        self.assertNotIn(threading.current_thread(), self.threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
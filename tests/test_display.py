@@ -0,0 +1,136 @@
+"""Tests for the display backends."""
+
+import os
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "disk")
+
+import pygame as pg
+from mvctools import AutoSprite
+from mvctools.display import DisplayBackend, RendererBackend, video
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FixedClock(object):
+    """Clock with a constant frame time, so the runs are identical."""
+
+    def tick(self, fps=0):
+        return 25
+
+    def get_fps(self):
+        return 40.0
+
+
+class Square(AutoSprite):
+    """Square sprite with a fixed image and position on layer 3."""
+
+    def init(self, image, position):
+        self.square = image
+        self.position = position
+
+    def get_image(self):
+        return self.square
+
+    def get_rect(self):
+        return self.square.get_rect(topleft=self.position)
+
+    def get_layer(self):
+        return 3
+
+
+class StaticSquare(Square):
+    """Square sprite drawn from the static layer."""
+
+    static = True
+
+
+def opaque_square(color):
+    image = pg.Surface((120, 120)).convert()
+    image.fill(color)
+    return image
+
+
+def colorkey_square(color):
+    image = opaque_square((255, 0, 255))
+    pg.draw.circle(image, color, (60, 60), 50)
+    image.set_colorkey((255, 0, 255))
+    return image
+
+
+def alpha_square(color, alpha):
+    image = pg.Surface((120, 120), pg.SRCALPHA, 32).convert_alpha()
+    image.fill((0, 0, 0, 0))
+    pg.draw.rect(image, color + (alpha,), (10, 10, 100, 100))
+    return image
+
+
+@unittest.skipIf(video is None, "pygame._sdl2 is not available")
+class RendererBackendTest(unittest.TestCase):
+    """The texture path draws the same frames as the software path."""
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        os.chdir(ROOT)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+
+    def run_menu(self, backend, squares, frames=6):
+        import run_examples
+        from examples.menuscreen import MenuState
+
+        class Menu(MenuState):
+            clock_class = FixedClock
+
+        class Example(run_examples.Example):
+            display_class = backend
+
+        control = Example()
+        control.settings.set_mode()
+        state = Menu(control)
+        for cls, image, position in squares():
+            cls(state.view, image, position)
+        result = []
+        for _ in range(frames):
+            state.tick()
+            if backend is RendererBackend:
+                surface = control.display.renderer.to_surface()
+                textured = state.view.is_textured()
+            else:
+                surface = control.display.get_surface()
+                textured = False
+            result.append((textured, pg.image.tostring(surface, "RGB")))
+        state.view.close()
+        return result
+
+    def compare(self, squares, textured):
+        expected = self.run_menu(DisplayBackend, squares)
+        frames = self.run_menu(RendererBackend, squares)
+        for index, (frame, reference) in enumerate(zip(frames, expected)):
+            self.assertEqual(frame[0], textured)
+            self.assertTrue(frame[1] == reference[1],
+                            "frame {} differs".format(index))
+
+    def test_exact_images(self):
+        # Overlapping sprites of a layer are drawn in the order they
+        # joined it, whatever their kind of image and group
+        def squares():
+            return [(Square, opaque_square((200, 0, 0)), (100, 100)),
+                    (Square, colorkey_square((0, 0, 200)), (160, 160)),
+                    (Square, alpha_square((0, 120, 0), 255), (130, 130)),
+                    (StaticSquare, opaque_square((200, 200, 0)), (140, 60))]
+        self.compare(squares, textured=True)
+
+    def test_translucent_images(self):
+        # The renderer doesn't blend translucent pixels as the blits do,
+        # so these frames are drawn in software
+        def squares():
+            return [(Square, opaque_square((200, 0, 0)), (100, 100)),
+                    (Square, alpha_square((0, 120, 0), 100), (130, 130))]
+        self.compare(squares, textured=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
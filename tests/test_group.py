@@ -0,0 +1,105 @@
+"""Tests for the sprite groups."""
+
+import unittest
+
+from pygame import Rect
+from pygame.sprite import DirtySprite, LayeredDirty, LayeredUpdates
+from mvctools.group import BufferedLayers, BufferedGroup
+
+
+class BufferedUpdates(BufferedLayers, LayeredUpdates):
+    """Plain layered group buffering the layer changes."""
+
+
+def make_sprites(count=6):
+    sprites = []
+    for index in range(count):
+        sprite = DirtySprite()
+        sprite.rect = Rect(10 * index, 0, 40, 40)
+        sprite.image = None
+        sprite._layer = index % 3 + 1
+        sprites.append(sprite)
+    return sprites
+
+
+# Operations on a group, replayed on the buffered and the reference groups
+OPERATIONS = [
+    lambda group, s: group.change_layer(s[0], 5),
+    lambda group, s: group.change_layer(s[3], 2.5),
+    lambda group, s: group.change_layer(s[4], 5),
+    lambda group, s: group.move_to_front(s[1]),
+    lambda group, s: group.move_to_back(s[5]),
+    lambda group, s: group.change_layer(s[2], 0.5),
+    lambda group, s: group.switch_layer(2.5, 5),
+    lambda group, s: group.change_layer(s[0], 1),
+    lambda group, s: group.remove_sprites_of_layer(1),
+    lambda group, s: group.add(s[6], layer=0.5),
+    lambda group, s: group.change_layer(s[6], 7),
+]
+
+# Read methods, returning sprite references or plain values
+READS = {
+    "sprites": lambda group: group.sprites(),
+    "iter": lambda group: list(group),
+    "layers": lambda group: group.layers(),
+    "get_sprite": lambda group: [group.get_sprite(index) for index
+                                 in range(-len(group), len(group))],
+    "get_top_layer": lambda group: group.get_top_layer(),
+    "get_bottom_layer": lambda group: group.get_bottom_layer(),
+    "get_top_sprite": lambda group: group.get_top_sprite(),
+    "get_sprites_at": lambda group: [group.get_sprites_at((x, 20))
+                                     for x in range(0, 100, 5)],
+    "get_sprites_from_layer": lambda group: [
+        group.get_sprites_from_layer(layer) for layer in group.layers()],
+    "get_layer_of_sprite": lambda group: [
+        group.get_layer_of_sprite(sprite) for sprite in group.sprites()],
+}
+
+
+class BufferedLayersTest(unittest.TestCase):
+    """Buffered groups read as their reference layered group after each
+    operation, whichever read method comes first."""
+
+    def replay(self, cls, count):
+        sprites = make_sprites(7)
+        group = cls(*sprites[:6])
+        for operation in OPERATIONS[:count]:
+            operation(group, sprites)
+        return group, sprites
+
+    def convert(self, value, sprites):
+        # Replace the sprites by their index in the sprite list
+        if isinstance(value, DirtySprite):
+            return sprites.index(value)
+        if isinstance(value, list):
+            return [self.convert(item, sprites) for item in value]
+        return value
+
+    def check(self, buffered_cls, reference_cls):
+        for count in range(1, len(OPERATIONS) + 1):
+            for name, read in sorted(READS.items()):
+                group, sprites = self.replay(buffered_cls, count)
+                reference, ref_sprites = self.replay(reference_cls, count)
+                self.assertEqual(
+                    self.convert(read(group), sprites),
+                    self.convert(read(reference), ref_sprites),
+                    "{} after {} operations".format(name, count))
+
+    def test_layered_dirty(self):
+        self.check(BufferedGroup, LayeredDirty)
+
+    def test_layered_updates(self):
+        self.check(BufferedUpdates, LayeredUpdates)
+
+    def test_dirty_flag(self):
+        group, sprites = self.replay(BufferedGroup, 0)
+        reference, ref_sprites = self.replay(LayeredDirty, 0)
+        for sprite in sprites + ref_sprites:
+            sprite.dirty = 0
+        group.change_layer(sprites[0], 5)
+        reference.change_layer(ref_sprites[0], 5)
+        self.assertEqual(sprites[0].dirty, ref_sprites[0].dirty)
+
+
+if __name__ == "__main__":
+    unittest.main()